@@ -0,0 +1,43 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# Worker threads per backend; override with <BACKEND>_WORKERS, e.g. SSH_WORKERS=32
+BACKEND_WORKERS = {
+    "portainer": 8,
+    "homeassistant": 8,
+    "ssh": 16,
+    "webhook": 8,
+}
+DEFAULT_WORKERS = 4
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def get_executor(backend: str) -> ThreadPoolExecutor:
+    """Returns the dedicated thread pool for a backend, creating it on first use."""
+    executor = _executors.get(backend)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(backend)
+            if executor is None:
+                workers = int(os.getenv(f"{backend.upper()}_WORKERS", BACKEND_WORKERS.get(backend, DEFAULT_WORKERS)))
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{backend}-io")
+                _executors[backend] = executor
+    return executor
+
+
+async def run_blocking(backend: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs blocking I/O on the backend's own pool and awaits it without blocking the event loop.
+
+    Each backend has its own bounded pool, so a burst of slow calls (a 300s image pull,
+    SSH connect timeouts) only queues behind its own backend instead of exhausting the
+    shared thread pool every other session's tools run on.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(backend), functools.partial(fn, *args, **kwargs))
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from logger import get_logger
+
+logger = get_logger()
+
+# Per-backend init deadline in seconds; override with <BACKEND>_INIT_DEADLINE, e.g. PORTAINER_INIT_DEADLINE=20
+DEFAULT_INIT_DEADLINE = float(os.getenv("BACKEND_INIT_DEADLINE", "10"))
+RETRY_MIN_SECONDS = float(os.getenv("BACKEND_RETRY_MIN", "1"))
+RETRY_MAX_SECONDS = float(os.getenv("BACKEND_RETRY_MAX", "60"))
+# How often a ready backend is checked again, so readiness follows the backend going down
+RECHECK_INTERVAL = float(os.getenv("BACKEND_RECHECK_INTERVAL", "60"))
+
+
+class Backend:
+    def __init__(self, name: str, check: Callable[[], Any], deadline: float, recheck: bool, error: Optional[str]):
+        self.name = name
+        self.check = check
+        self.deadline = deadline
+        self.recheck = recheck
+        self.state = "down" if error else "pending"
+        self.detail = ""
+        self.error = error
+        self.attempts = 1 if error else 0
+        self.since = time.time()
+        self.last_ok: Optional[float] = None
+        self.next_attempt: Optional[float] = None
+
+
+class BackendRegistry:
+    """
+    Initializes backends concurrently and tracks whether each one is ready.
+
+    Every backend gets its own supervisor thread. It runs the backend's check with a
+    deadline; a check that fails or misses the deadline marks the backend down and is
+    retried with exponential backoff until it succeeds. Ready backends are re-checked
+    every BACKEND_RECHECK_INTERVAL seconds. A slow backend never delays the others or
+    the server itself.
+    """
+
+    def __init__(self):
+        self.backends: Dict[str, Backend] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="backend-init")
+        self._started = False
+
+    def register(self, name: str, check: Callable[[], Any], deadline: Optional[float] = None,
+                 recheck: bool = True, error: Optional[str] = None):
+        """
+        Registers a backend; check() should do a cheap round trip and may return a short status detail.
+
+        Pass error when the first attempt already failed, so the supervisor starts with a backoff.
+        recheck=False stops supervising once the check succeeds (one-off initialization).
+        """
+        if deadline is None:
+            deadline = float(os.getenv(f"{name.upper()}_INIT_DEADLINE", DEFAULT_INIT_DEADLINE))
+        backend = Backend(name, check, deadline, recheck, error)
+        with self._lock:
+            self.backends[name] = backend
+            started = self._started
+        if started:
+            self._spawn(backend)
+
+    def start(self):
+        """Starts supervising every registered backend; returns immediately."""
+        with self._lock:
+            self._started = True
+            backends = list(self.backends.values())
+        for backend in backends:
+            self._spawn(backend)
+
+    def _spawn(self, backend: Backend):
+        threading.Thread(target=self._supervise, args=(backend,), name=f"backend-{backend.name}", daemon=True).start()
+
+    def _set(self, backend: Backend, state: str, detail: str = "", error: Optional[str] = None):
+        with self._lock:
+            changed = backend.state != state
+            backend.state, backend.detail, backend.error = state, detail, error
+            if changed:
+                backend.since = time.time()
+            if state == "ready":
+                backend.last_ok = time.time()
+        if changed and state == "ready":
+            logger.info(f"✅ Backend {backend.name} ready{f' ({detail})' if detail else ''}")
+        elif changed:
+            logger.warning(f"⚠ Backend {backend.name} down: {error}")
+
+    def _supervise(self, backend: Backend):
+        backoff = RETRY_MIN_SECONDS
+        attempt = None
+        if backend.error:
+            backend.next_attempt = time.time() + backoff
+            time.sleep(backoff)
+        while True:
+            # A check still hanging from a previous attempt is awaited again instead of piling up new ones
+            if attempt is None or attempt.done():
+                attempt = self._executor.submit(backend.check)
+                with self._lock:
+                    backend.attempts += 1
+            try:
+                detail = attempt.result(timeout=backend.deadline)
+                self._set(backend, "ready", str(detail) if detail else "")
+                if not backend.recheck:
+                    backend.next_attempt = None
+                    return
+                backoff = RETRY_MIN_SECONDS
+                delay = RECHECK_INTERVAL
+            except FutureTimeout:
+                self._set(backend, "down", error=f"no response within {backend.deadline:g}s")
+                delay = backoff
+                backoff = min(backoff * 2, RETRY_MAX_SECONDS)
+            except Exception as e:
+                attempt = None
+                self._set(backend, "down", error=str(e) or type(e).__name__)
+                delay = backoff
+                backoff = min(backoff * 2, RETRY_MAX_SECONDS)
+            backend.next_attempt = time.time() + delay
+            time.sleep(delay)
+
+    def is_ready(self, name: str) -> bool:
+        backend = self.backends.get(name)
+        return backend is not None and backend.state == "ready"
+
+    def prometheus_lines(self) -> List[str]:
+        with self._lock:
+            states = [(b.name, b.state == "ready") for b in self.backends.values()]
+        return ["# HELP mcp_backend_up Whether the backend's readiness check passes.",
+                "# TYPE mcp_backend_up gauge",
+                *(f'mcp_backend_up{{backend="{name}"}} {int(up)}' for name, up in states)]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        def fmt(ts):
+            return datetime.fromtimestamp(ts).strftime("%d.%m.%Y %H:%M:%S") if ts else None
+
+        with self._lock:
+            return {
+                b.name: {
+                    "state": b.state,
+                    "detail": b.detail,
+                    "error": b.error,
+                    "attempts": b.attempts,
+                    "since": fmt(b.since),
+                    "last_ok": fmt(b.last_ok),
+                    "next_attempt": fmt(b.next_attempt),
+                }
+                for b in self.backends.values()
+            }
+
+
+backends = BackendRegistry()
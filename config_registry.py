@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+from logger import get_logger
+
+logger = get_logger()
+
+CONFIG_POLL_INTERVAL = float(os.getenv("CONFIG_POLL_INTERVAL", "1.0"))
+
+
+class _ConfigEntry:
+    def __init__(self, path: str, default: Any, validator: Optional[Callable[[Any], bool]]):
+        self.path = path
+        self.default = default
+        self.validator = validator
+        self.value: Any = default
+        self.signature: Optional[tuple] = None
+
+
+class ConfigRegistry:
+    """
+    Parses each JSON data file once and keeps the parsed object in memory.
+
+    A background watcher stats registered files and reloads them when their
+    inode, mtime or size changes, so tool calls never touch the disk. A file
+    that fails to parse or validate (e.g. half-written) keeps its last good value.
+    """
+
+    def __init__(self, poll_interval: float = CONFIG_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._entries: Dict[str, _ConfigEntry] = {}
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+
+    def get(self, path: str, default: Any = None, validator: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Returns the cached parsed content of a JSON file, loading (or creating it with default) on first use."""
+        path = os.path.abspath(path)
+        entry = self._entries.get(path)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is None:
+                    entry = _ConfigEntry(path, default, validator)
+                    if not os.path.exists(path) and default is not None:
+                        self._write(path, default)
+                    self._reload(entry)
+                    self._entries[path] = entry
+                    self._start_watcher()
+        return entry.value
+
+    def save(self, path: str, value: Any, indent: int = 4):
+        """Atomically writes a JSON file and updates the cached value."""
+        path = os.path.abspath(path)
+        with self._lock:
+            self._write(path, value, indent)
+            entry = self._entries.get(path)
+            if entry:
+                entry.value = value
+                entry.signature = self._signature(path)
+
+    def reload(self, path: str) -> Any:
+        """Forces a re-read of a registered file and returns its (possibly unchanged) value."""
+        entry = self._entries[os.path.abspath(path)]
+        with self._lock:
+            self._reload(entry)
+        return entry.value
+
+    @staticmethod
+    def _signature(path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    @staticmethod
+    def _write(path: str, value: Any, indent: int = 4):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, indent=indent, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _reload(self, entry: _ConfigEntry) -> bool:
+        signature = self._signature(entry.path)
+        if signature is None:
+            entry.signature = None
+            return False
+        try:
+            with open(entry.path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            if entry.validator and not entry.validator(value):
+                raise ValueError("validation failed")
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠ Keeping last good version of {entry.path}: {e}")
+            # Don't retry until the file changes again
+            entry.signature = signature
+            return False
+        entry.value = value
+        entry.signature = signature
+        return True
+
+    def _poll(self):
+        for entry in list(self._entries.values()):
+            if self._signature(entry.path) == entry.signature:
+                continue
+            with self._lock:
+                # Re-check under the lock: save() may have just updated the file and signature
+                if self._signature(entry.path) != entry.signature and self._reload(entry):
+                    logger.info(f"🔄 Reloaded config file: {entry.path}")
+
+    def _start_watcher(self):
+        if self._watcher and self._watcher.is_alive():
+            return
+
+        def watch():
+            stop = threading.Event()
+            while not stop.wait(self.poll_interval):
+                try:
+                    self._poll()
+                except Exception as e:
+                    logger.error(f"❌ Config watcher error: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+
+config_registry = ConfigRegistry()
@@ -0,0 +1,59 @@
+import bisect
+import threading
+from typing import Any, Dict, Sequence
+
+# Seconds; spans fast HTTP calls up to the scheduler's 300s misfire grace time
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class Histogram:
+    """
+    Fixed-bucket, Prometheus-style latency histogram.
+
+    Constant memory regardless of how many values are observed, so it can sit on hot
+    paths (every job firing, every webhook) and still be exported as-is.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile by interpolating inside the bucket it falls into."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for i, bucket_count in enumerate(self.counts):
+                if bucket_count and seen + bucket_count >= rank:
+                    lower = self.buckets[i - 1] if i > 0 else 0.0
+                    upper = min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+                    return lower + (upper - lower) * (rank - seen) / bucket_count
+                seen += bucket_count
+            return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns count/sum/max and cumulative bucket counts keyed by upper bound ('+Inf' last)."""
+        with self._lock:
+            cumulative, total = {}, 0
+            for bound, bucket_count in zip([*self.buckets, "+Inf"], self.counts):
+                total += bucket_count
+                cumulative[bound] = total
+            return {"count": self.count, "sum": self.sum, "max": self.max, "buckets": cumulative}
+
+    def summary(self) -> Dict[str, float]:
+        avg = self.sum / self.count if self.count else 0.0
+        return {"count": self.count, "avg": round(avg, 4), "p50": round(self.quantile(0.5), 4),
+                "p95": round(self.quantile(0.95), 4), "p99": round(self.quantile(0.99), 4), "max": round(self.max, 4)}
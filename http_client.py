@@ -0,0 +1,69 @@
+import os
+import threading
+from typing import Dict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Per-backend defaults; each value can be overridden with <BACKEND>_HTTP_<SETTING>, e.g. PORTAINER_HTTP_TIMEOUT=60
+BACKEND_DEFAULTS = {
+    "portainer": {"timeout": 30, "pool_size": 10, "retries": 3},
+    "homeassistant": {"timeout": 10, "pool_size": 10, "retries": 3},
+    "webhook": {"timeout": 10, "pool_size": 10, "retries": 3},
+}
+DEFAULT_BACKEND_SETTINGS = {"timeout": 30, "pool_size": 10, "retries": 3}
+RETRY_BACKOFF_FACTOR = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+# Only idempotent methods are retried; POST (service calls, container actions, webhooks) never is
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+
+
+class BackendSession(requests.Session):
+    """A requests.Session with a default timeout, so every call has one even if the caller forgets."""
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+
+_sessions: Dict[str, BackendSession] = {}
+_lock = threading.Lock()
+
+
+def backend_settings(backend: str) -> Dict[str, float]:
+    settings = dict(BACKEND_DEFAULTS.get(backend, DEFAULT_BACKEND_SETTINGS))
+    for key, value in settings.items():
+        override = os.getenv(f"{backend.upper()}_HTTP_{key.upper()}")
+        if override:
+            settings[key] = type(value)(override)
+    return settings
+
+
+def get_session(backend: str) -> BackendSession:
+    """Returns the shared keep-alive session for a backend, creating it on first use."""
+    session = _sessions.get(backend)
+    if session is None:
+        with _lock:
+            session = _sessions.get(backend)
+            if session is None:
+                settings = backend_settings(backend)
+                retry = Retry(
+                    total=settings["retries"],
+                    backoff_factor=RETRY_BACKOFF_FACTOR,
+                    status_forcelist=[502, 503, 504],
+                    allowed_methods=IDEMPOTENT_METHODS,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=settings["pool_size"],
+                    pool_maxsize=settings["pool_size"],
+                    max_retries=retry,
+                )
+                session = BackendSession(settings["timeout"])
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _sessions[backend] = session
+    return session
@@ -1,11 +1,38 @@
+import time
+
+STARTED = time.perf_counter()
+
 from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from backend_health import backends
 from module_loader import load_modules
+from logger import get_logger
+from tool_metrics import tool_metrics
 
 mcp = FastMCP("mcp-network")
 
 # load modules and tools
 load_modules(mcp)
 
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """200 once every backend is ready, 503 otherwise; the body has each backend's state either way."""
+    snapshot = backends.snapshot()
+    ready = all(b["state"] == "ready" for b in snapshot.values())
+    return JSONResponse({"ready": ready, "backends": snapshot}, status_code=200 if ready else 503)
+
+
+tool_metrics.add_collector(backends.prometheus_lines)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Prometheus metrics: per-tool calls/latency/errors/payload sizes, scheduler and backend readiness."""
+    return PlainTextResponse(tool_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
+    get_logger().info(f"⏱ Startup took {(time.perf_counter() - STARTED) * 1000:.0f} ms (imports included)")
     print("🚀 Starting MCP server... host=0.0.0.0, port=8080")
     mcp.run(transport="streamable-http", host="0.0.0.0", port=8080)
@@ -1,39 +1,77 @@
 import importlib
 import pkgutil
+import time
 import modules
 from fastmcp import FastMCP
+from backend_health import backends
 from logger import get_logger
+from tool_metrics import InstrumentedMCP
 
 logger = get_logger()
 
+def load_module(mcp: FastMCP, full_name: str, start: bool = False):
+    """
+    Imports a module and registers its tools; with start=True also runs its start_scheduler hook.
+
+    Tools are registered through InstrumentedMCP, so every call is timed and counted under
+    the module's TOOL_BACKEND (default "local").
+    """
+    module = importlib.import_module(full_name)
+    if hasattr(module, "register_tools"):
+        module.register_tools(InstrumentedMCP(mcp, full_name, getattr(module, "TOOL_BACKEND", "local")))
+    if start and hasattr(module, "start_scheduler"):
+        module.start_scheduler(mcp)
+    return module
+
 def load_modules(mcp: FastMCP):
+    """
+    Imports every module and registers its tools, then runs the modules' start_scheduler hooks.
+
+    Registration must stay free of backend I/O (clients are built on first use), so the
+    server can start serving even while Portainer, Home Assistant or SSH hosts are down.
+    Backends are then initialized concurrently in the background (see backend_health),
+    and a module that fails to load is retried there too, so its tools appear once it loads.
+    """
     logger.info("🔍 Starting tool loading process...")
+    started = time.perf_counter()
     loaded_modules = []
     registered_tools = []
+    timings = {}
 
     for loader, module_name, is_pkg in pkgutil.iter_modules(modules.__path__):
         full_name = f"modules.{module_name}"
+        module_started = time.perf_counter()
         try:
-            module = importlib.import_module(full_name)
-            loaded_modules.append(full_name)
+            module = load_module(mcp, full_name)
+            loaded_modules.append(module)
             logger.info(f"✅ Loaded module: {full_name}")
-
-            # Register tools if function exists
             if hasattr(module, "register_tools"):
-                module.register_tools(mcp)
                 registered_tools.append(full_name)
 
-            # Start scheduler if function exists
-            if hasattr(module, "start_scheduler"):
-                module.start_scheduler(mcp)
-
         except Exception as e:
             logger.error(f"❌ Failed to load module {full_name}: {e}")
 
+            def retry_load(name=full_name):
+                load_module(mcp, name, start=True)
+                return "loaded"
+
+            backends.register(f"module:{module_name}", retry_load, recheck=False, error=str(e))
+        timings[full_name] = time.perf_counter() - module_started
+
+    registered_at = time.perf_counter()
+
+    # Start schedulers if function exists; these only spawn background work
+    for module in loaded_modules:
+        if hasattr(module, "start_scheduler"):
+            try:
+                module.start_scheduler(mcp)
+            except Exception as e:
+                logger.error(f"❌ Failed to start scheduler of {module.__name__}: {e}")
+
     if loaded_modules:
         logger.info("📦 Modules loaded successfully:")
         for mod in loaded_modules:
-            logger.info(f"    - {mod}")
+            logger.info(f"    - {mod.__name__} ({timings[mod.__name__] * 1000:.0f} ms)")
     else:
         logger.warning("⚠ No modules were loaded from tools directory.")
 
@@ -44,4 +82,9 @@ def load_modules(mcp: FastMCP):
     else:
         logger.warning("⚠ No MCP tools were registered.")
 
-    return loaded_modules, registered_tools
+    backends.start()
+
+    logger.info(f"⏱ Tools registered in {(registered_at - started) * 1000:.0f} ms, "
+                f"schedulers started in {(time.perf_counter() - registered_at) * 1000:.0f} ms")
+
+    return [mod.__name__ for mod in loaded_modules], registered_tools
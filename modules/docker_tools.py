@@ -1,35 +1,186 @@
-import requests
 import os
+import json
+import time
 import threading
+import itertools
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import asyncio
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
+from http_client import get_session
+from backend_executor import run_blocking
+from backend_health import backends
 load_dotenv()
 
-PORTAINER_URL = os.getenv('PORTAINER_URL').rstrip("/")
-PORTAINER_ACCESS_TOKEN = os.getenv("PORTAINER_ACCESS_TOKEN").strip()
+TOOL_BACKEND = "portainer"  # label for tool metrics
+PORTAINER_URL = os.getenv('PORTAINER_URL', '').rstrip("/")
+PORTAINER_ACCESS_TOKEN = os.getenv("PORTAINER_ACCESS_TOKEN", "").strip()
+# Full re-list fallback for the name -> ID index in case Docker events are missed
+CONTAINER_INDEX_TTL = int(os.getenv("CONTAINER_INDEX_TTL", "300"))
+CONTAINER_EVENTS = ["create", "destroy", "rename"]
+BULK_MAX_CONCURRENCY = 4
+BULK_ACTIONS = {"start": "▶", "stop": "🛑", "restart": "🔄"}
+ENDPOINTS_CACHE_TTL = int(os.getenv("PORTAINER_ENDPOINTS_TTL", "300"))
+
+# ---------------- Container logs ----------------
+
+LOG_STREAMS = {0: "stdin", 1: "stdout", 2: "stderr"}
+DEFAULT_LOG_BYTE_BUDGET = 16000
+
+
+class LogDemuxer:
+    """
+    Splits a Docker log stream into (stream, line) pairs.
+
+    Containers without a TTY multiplex stdout/stderr into frames with an 8-byte header
+    (stream type, 3 zero bytes, big-endian payload size). TTY containers send raw text,
+    reported as stdout. Partial lines are kept per stream until their newline arrives.
+    """
+
+    def __init__(self):
+        self.buffer = b""
+        self.multiplexed = None
+        self.partial = {}
+
+    def _split(self, stream, data):
+        data = self.partial.pop(stream, b"") + data
+        *lines, rest = data.split(b"\n")
+        if rest:
+            self.partial[stream] = rest
+        return [(LOG_STREAMS.get(stream, "stdout"), line.decode("utf-8", "replace")) for line in lines]
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        if self.multiplexed is None:
+            if len(self.buffer) < 8:
+                return []
+            self.multiplexed = self.buffer[0] in LOG_STREAMS and self.buffer[1:4] == b"\0\0\0"
+        if not self.multiplexed:
+            data, self.buffer = self.buffer, b""
+            return self._split(1, data)
+
+        lines = []
+        while len(self.buffer) >= 8:
+            size = int.from_bytes(self.buffer[4:8], "big")
+            if len(self.buffer) < 8 + size:
+                break
+            stream, payload = self.buffer[0], self.buffer[8:8 + size]
+            self.buffer = self.buffer[8 + size:]
+            lines.extend(self._split(stream, payload))
+        return lines
+
+    def flush(self):
+        """Returns the lines still buffered once the stream ends, including any trailing partial line."""
+        lines = []
+        if self.buffer and not self.multiplexed:
+            # Under 8 bytes never got past stream detection; that short a stream can only be raw (TTY) text
+            self.multiplexed = False
+            lines = self.feed(b"")
+        for stream in list(self.partial):
+            lines.append((LOG_STREAMS.get(stream, "stdout"), self.partial.pop(stream).decode("utf-8", "replace")))
+        return lines
+
+
+def rfc3339_to_unix(timestamp):
+    """Converts Docker's RFC3339Nano timestamp to 'seconds.nanoseconds' without losing precision."""
+    main, _, fraction = timestamp.rstrip("Z").partition(".")
+    seconds = int(datetime.fromisoformat(main).replace(tzinfo=timezone.utc).timestamp())
+    return f"{seconds}.{fraction.ljust(9, '0')[:9]}"
+
+
+def to_docker_time(value):
+    """Accepts a unix timestamp, an ISO date ('2024-05-01T10:00:00') or a relative age ('15m', '2h', '1d')."""
+    if not value:
+        return ""
+    value = str(value).strip()
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if value[-1] in units and value[:-1].isdigit():
+        return str(int(time.time()) - int(value[:-1]) * units[value[-1]])
+    try:
+        float(value)
+        return value
+    except ValueError:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.astimezone()
+        return str(int(parsed.timestamp()))
+
+
+# ---------------- Container stats ----------------
+
+STATS_CACHE_TTL = float(os.getenv("CONTAINER_STATS_TTL", "5"))
+STATS_MAX_CONCURRENCY = 8
+
+
+def summarize_container_stats(name, stats):
+    """Computes CPU %, memory and network totals from one Docker stats sample (stream=false)."""
+    cpu, precpu = stats.get("cpu_stats", {}), stats.get("precpu_stats", {})
+    cpu_delta = cpu.get("cpu_usage", {}).get("total_usage", 0) - precpu.get("cpu_usage", {}).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    online_cpus = cpu.get("online_cpus") or len(cpu.get("cpu_usage", {}).get("percpu_usage") or []) or 1
+    cpu_percent = cpu_delta / system_delta * online_cpus * 100 if cpu_delta > 0 and system_delta > 0 else 0.0
+
+    memory = stats.get("memory_stats", {})
+    # Page cache is reclaimable; 'docker stats' subtracts it too (cgroup v2: inactive_file, v1: cache)
+    cache = memory.get("stats", {}).get("inactive_file", memory.get("stats", {}).get("cache", 0))
+    mem_used = max(memory.get("usage", 0) - cache, 0)
+    mem_limit = memory.get("limit", 0)
+
+    networks = stats.get("networks") or {}
+    return {
+        "name": name,
+        "cpu_percent": round(cpu_percent, 2),
+        "mem_bytes": mem_used,
+        "mem_percent": round(mem_used / mem_limit * 100, 2) if mem_limit else 0.0,
+        "net_rx_bytes": sum(n.get("rx_bytes", 0) for n in networks.values()),
+        "net_tx_bytes": sum(n.get("tx_bytes", 0) for n in networks.values()),
+    }
+
+
+def format_bytes(value):
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if value < 1024:
+            return f"{value:.0f}{unit}" if unit == "B" else f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}TiB"
+
 
 class PortainerAPI:
-    def __init__(self, url, api_key):
+    def __init__(self, url, api_key, endpoint_id=None, endpoint_name=""):
         self.url = url.rstrip("/")
         self.base_url = f"{self.url}/api"
         # שינוי כאן → שימוש ב־X-API-Key במקום Authorization: Bearer
         self.headers = {"X-API-Key": api_key}
-        self.endpoint_id = self._get_endpoint_id()
+        self.session = get_session("portainer")
+        self.endpoint_id = endpoint_id if endpoint_id is not None else self._get_endpoint_id()
+        self.endpoint_name = endpoint_name or str(self.endpoint_id)
+        self._container_index = {}
+        self._index_loaded_at = 0.0
+        self._index_lock = threading.Lock()
+        self._last_event_time = None
+        self._events_thread = threading.Thread(target=self._watch_container_events, daemon=True)
+        self._events_thread.start()
 
     def _get(self, path, json_response=True, **kwargs):
-        kwargs.setdefault("timeout", 30)
-        r = requests.get(f"{self.base_url}{path}", headers=self.headers, **kwargs)
+        r = self.session.get(f"{self.base_url}{path}", headers=self.headers, **kwargs)
         r.raise_for_status()
         return r.json() if json_response else r.text
 
     def _post(self, path, **kwargs):
-        kwargs.setdefault("timeout", 30)
-        r = requests.post(f"{self.base_url}{path}", headers=self.headers, **kwargs)
+        r = self.session.post(f"{self.base_url}{path}", headers=self.headers, **kwargs)
         r.raise_for_status()
         return r.json() if r.text else {}
 
     def _post_nojson(self, path, **kwargs):
-        kwargs.setdefault("timeout", 30)
-        r = requests.post(f"{self.base_url}{path}", headers=self.headers, **kwargs)
+        r = self.session.post(f"{self.base_url}{path}", headers=self.headers, **kwargs)
+        r.raise_for_status()
+        return r.text
+
+    def _delete(self, path, **kwargs):
+        r = self.session.delete(f"{self.base_url}{path}", headers=self.headers, **kwargs)
         r.raise_for_status()
         return r.text
 
@@ -42,16 +193,104 @@ class PortainerAPI:
     def _post_action(self, container_id, action):
         return self._post_nojson(f"/endpoints/{self.endpoint_id}/docker/containers/{container_id}/{action}")
 
-    def get_container_id(self, name):
+    # ---------------- Container name -> ID index ----------------
+
+    def _refresh_container_index(self):
         containers = self.list_containers(all_containers=True)
-        for c in containers:
-            if any(name.strip("/") == n.strip("/") for n in c["Names"]):
-                return c["Id"]
-        raise ValueError(f"Container '{name}' not found")
+        index = {n.strip("/"): c["Id"] for c in containers for n in c["Names"]}
+        with self._index_lock:
+            self._container_index = index
+            self._index_loaded_at = time.monotonic()
+
+    def _index_container(self, name, container_id):
+        with self._index_lock:
+            self._container_index[name.strip("/")] = container_id
+
+    def _unindex_container(self, container_id):
+        with self._index_lock:
+            for n in [n for n, cid in self._container_index.items() if cid == container_id]:
+                del self._container_index[n]
+
+    def _apply_container_event(self, event):
+        action = event.get("Action") or event.get("status")
+        actor = event.get("Actor", {})
+        container_id = actor.get("ID") or event.get("id")
+        attributes = actor.get("Attributes", {})
+        if action == "create" and attributes.get("name"):
+            self._index_container(attributes["name"], container_id)
+        elif action == "destroy":
+            self._unindex_container(container_id)
+        elif action == "rename":
+            self._unindex_container(container_id)
+            self._index_container(attributes.get("name", ""), container_id)
+        self._last_event_time = event.get("time", self._last_event_time)
+
+    def _watch_container_events(self):
+        """Follows the Docker /events stream through Portainer and keeps the container index current."""
+        backoff = 1
+        while True:
+            params = {"filters": json.dumps({"type": ["container"], "event": CONTAINER_EVENTS})}
+            if self._last_event_time:
+                # Replay anything that happened while we were disconnected
+                params["since"] = self._last_event_time
+            try:
+                with self.session.get(
+                    f"{self.base_url}/endpoints/{self.endpoint_id}/docker/events",
+                    headers=self.headers, params=params, stream=True, timeout=(10, None)
+                ) as r:
+                    r.raise_for_status()
+                    if not self._last_event_time:
+                        self._refresh_container_index()
+                    backoff = 1
+                    for line in r.iter_lines():
+                        if line:
+                            self._apply_container_event(json.loads(line))
+            except Exception as e:
+                print(f"❌ Docker events stream disconnected: {e}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
 
-    def list_containers(self, all_containers=False):
-        all_flag = "1" if all_containers else "0"
-        return self._get(f"/endpoints/{self.endpoint_id}/docker/containers/json?all={all_flag}")
+    def get_container_id(self, name):
+        name = name.strip("/")
+        if time.monotonic() - self._index_loaded_at > CONTAINER_INDEX_TTL:
+            self._refresh_container_index()
+        container_id = self._container_index.get(name)
+        if container_id is None:
+            # Might have been created since the last refresh and its event not seen yet
+            self._refresh_container_index()
+            container_id = self._container_index.get(name)
+        if container_id is None:
+            raise ValueError(f"Container '{name}' not found")
+        return container_id
+
+    def list_containers(self, all_containers=False, filters=None):
+        """Lists containers; filters (e.g. {"status": ["exited"], "label": ["a=b"]}) are applied by Docker."""
+        params = {"all": "1" if all_containers else "0"}
+        if filters:
+            params["filters"] = json.dumps(filters)
+        return self._get(f"/endpoints/{self.endpoint_id}/docker/containers/json", params=params)
+
+    def find_containers(self, names=None, label="", compose_project=""):
+        """
+        Resolves container names, a label selector and/or a compose project to ({name: id}, unknown names).
+
+        The result is the union of all selectors. Docker ANDs label filters within a query,
+        so each label selector gets its own query and the results are merged by container ID.
+        Names that match no container are returned separately instead of failing the lookup.
+        """
+        by_id, missing = {}, []
+        for name in names or []:
+            try:
+                by_id.setdefault(self.get_container_id(name), name.strip("/"))
+            except ValueError:
+                missing.append(name.strip("/"))
+        labels = [label] if label else []
+        if compose_project:
+            labels.append(f"com.docker.compose.project={compose_project}")
+        for selector in labels:
+            for c in self.list_containers(all_containers=True, filters={"label": [selector]}):
+                by_id.setdefault(c["Id"], c["Names"][0].strip("/"))
+        return {name: container_id for container_id, name in by_id.items()}, missing
 
     def get_container_status(self, name):
         container_id = self.get_container_id(name)
@@ -59,12 +298,51 @@ class PortainerAPI:
         return details["State"]
 
     def get_container_logs(self, name, lines=50):
+        result = self.read_container_logs(name, tail=lines, max_bytes=None)
+        return "\n".join(line for _, _, line in result["lines"])
+
+    def read_container_logs(self, name, since="", until="", tail="all", skip=0, max_bytes=DEFAULT_LOG_BYTE_BUDGET):
+        """
+        Streams demultiplexed log lines as (timestamp, stream, text).
+
+        Reading stops once max_bytes of text has been collected, so a huge backlog is never
+        fully transferred. 'skip' drops lines at exactly the 'since' timestamp that a previous
+        call already returned (Docker's since is inclusive).
+        """
         container_id = self.get_container_id(name)
-        logs = self._get(
-            f"/endpoints/{self.endpoint_id}/docker/containers/{container_id}/logs?stdout=1&stderr=1&tail={lines}",
-            json_response=False
-        )
-        return logs
+        params = {"stdout": "1", "stderr": "1", "timestamps": "1", "tail": str(tail)}
+        if since:
+            params["since"] = since
+        if until:
+            params["until"] = until
+
+        demuxer = LogDemuxer()
+        lines, used, truncated = [], 0, False
+        with self.session.get(
+            f"{self.base_url}/endpoints/{self.endpoint_id}/docker/containers/{container_id}/logs",
+            headers=self.headers, params=params, stream=True
+        ) as r:
+            r.raise_for_status()
+            # A trailing None flushes partial lines once the stream ends
+            for chunk in itertools.chain(r.iter_content(chunk_size=8192), [None]):
+                for stream, raw in (demuxer.feed(chunk) if chunk is not None else demuxer.flush()):
+                    timestamp, _, text = raw.partition(" ")
+                    ts = rfc3339_to_unix(timestamp) if timestamp else ""
+                    if skip and ts == since:
+                        skip -= 1
+                        continue
+                    if max_bytes is not None and used + len(text) > max_bytes and lines:
+                        truncated = True
+                        break
+                    used += len(text) + 1
+                    lines.append((ts, stream, text))
+                if truncated:
+                    break
+        return {"lines": lines, "truncated": truncated}
+
+    def get_container_stats(self, container_id):
+        return self._get(f"/endpoints/{self.endpoint_id}/docker/containers/{container_id}/stats",
+                         params={"stream": "false"})
 
     def start_container(self, name):
         container_id = self.get_container_id(name)
@@ -78,25 +356,44 @@ class PortainerAPI:
         container_id = self.get_container_id(name)
         return self._post_action(container_id, "restart")
 
-    def deploy_latest_image(self, name):
+    def container_action(self, container_id, action):
+        """Runs start, stop or restart on a container by ID, for callers that already resolved it."""
+        if action not in BULK_ACTIONS:
+            raise ValueError(f"Unknown container action '{action}'")
+        return self._post_action(container_id, action)
+
+    def pull_image(self, image_name, on_progress=None):
+        """Pulls an image, passing each JSON progress message from /images/create to on_progress."""
+        # Extended read timeout (5 minutes) between progress messages
+        with self.session.post(
+            f"{self.base_url}/endpoints/{self.endpoint_id}/docker/images/create",
+            headers=self.headers, params={"fromImage": image_name}, stream=True, timeout=(10, 300)
+        ) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                message = json.loads(line)
+                if message.get("error"):
+                    raise RuntimeError(message["error"])
+                if on_progress:
+                    on_progress(message)
+
+    def deploy_latest_image(self, name, on_progress=None, on_phase=None):
         container_id = self.get_container_id(name)
         details = self._get(f"/endpoints/{self.endpoint_id}/docker/containers/{container_id}/json")
         image_name = details["Config"]["Image"]
 
-        # Pull new image with extended timeout (5 minutes)
-        self._post_nojson(
-            f"/endpoints/{self.endpoint_id}/docker/images/create?fromImage={image_name}",
-            timeout=300
-        )
+        if on_phase:
+            on_phase("pulling")
+        self.pull_image(image_name, on_progress)
 
+        if on_phase:
+            on_phase("recreating")
         # Stop and remove container
         self.stop_container(name)
-        r = requests.delete(
-            f"{self.base_url}/endpoints/{self.endpoint_id}/docker/containers/{container_id}?force=1",
-            headers=self.headers,
-            timeout=30
-        )
-        r.raise_for_status()
+        self._delete(f"/endpoints/{self.endpoint_id}/docker/containers/{container_id}?force=1")
+        self._unindex_container(container_id)
 
         config = details["Config"]
         host_config = details.get("HostConfig", {})
@@ -118,66 +415,491 @@ class PortainerAPI:
             "Entrypoint": config.get("Entrypoint"),
         }
 
-        self._post(f"/endpoints/{self.endpoint_id}/docker/containers/create?name={name}", json=create_payload, timeout=30)
+        created = self._post(f"/endpoints/{self.endpoint_id}/docker/containers/create?name={name}", json=create_payload, timeout=30)
+        if created.get("Id"):
+            self._index_container(name, created["Id"])
         self.start_container(name)
 
         return f"✅ Container '{name}' updated with latest image"
 
 
-portainer = PortainerAPI(PORTAINER_URL, PORTAINER_ACCESS_TOKEN)
+class PortainerCluster:
+    """
+    Caches Portainer's endpoint list and keeps one PortainerAPI per Docker endpoint.
+
+    Each endpoint's PortainerAPI has its own container index and events stream; they all
+    share the pooled Portainer HTTP session.
+    """
+
+    def __init__(self, url, api_key):
+        self.url = url.rstrip("/")
+        self.api_key = api_key
+        self.headers = {"X-API-Key": api_key}
+        self.session = get_session("portainer")
+        self._endpoints = []
+        self._loaded_at = 0.0
+        self._apis = {}
+        self._lock = threading.Lock()
+
+    def endpoints(self, refresh=False):
+        """Returns [{"Id", "Name", "Up"}] for every endpoint, cached for PORTAINER_ENDPOINTS_TTL seconds."""
+        if refresh or time.monotonic() - self._loaded_at > ENDPOINTS_CACHE_TTL:
+            if not self.url:
+                raise ValueError("PORTAINER_URL is not set")
+            r = self.session.get(f"{self.url}/api/endpoints", headers=self.headers)
+            r.raise_for_status()
+            # Portainer endpoint Status: 1 = up, 2 = down
+            self._endpoints = [{"Id": e["Id"], "Name": e.get("Name", str(e["Id"])), "Up": e.get("Status", 1) == 1}
+                               for e in r.json()]
+            self._loaded_at = time.monotonic()
+        return self._endpoints
+
+    def _find_endpoint(self, endpoint):
+        for e in self.endpoints():
+            if endpoint.lower() in (e["Name"].lower(), str(e["Id"])):
+                return e
+        return None
+
+    def api(self, endpoint=""):
+        """Returns the PortainerAPI for an endpoint name or ID; the first endpoint when empty."""
+        if not endpoint:
+            endpoints = self.endpoints()
+            if not endpoints:
+                raise ValueError("No endpoints found in Portainer")
+            match = endpoints[0]
+        else:
+            match = self._find_endpoint(endpoint)
+            if match is None:
+                # Might be a newly added endpoint
+                self.endpoints(refresh=True)
+                match = self._find_endpoint(endpoint)
+            if match is None:
+                raise ValueError(f"Endpoint '{endpoint}' not found")
+        with self._lock:
+            api = self._apis.get(match["Id"])
+            if api is None:
+                api = PortainerAPI(self.url, self.api_key, endpoint_id=match["Id"], endpoint_name=match["Name"])
+                self._apis[match["Id"]] = api
+        return api
+
+    def apis(self, endpoint=""):
+        """Returns the APIs to query: every reachable endpoint for 'all', otherwise just one."""
+        if endpoint == "all":
+            return [self.api(str(e["Id"])) for e in self.endpoints() if e["Up"]]
+        return [self.api(endpoint)]
+
+
+# No network here: endpoints and per-endpoint APIs are loaded on first use
+cluster = PortainerCluster(PORTAINER_URL, PORTAINER_ACCESS_TOKEN)
+
+
+def check_portainer():
+    """Readiness check: refreshes the endpoint list and warms up the default endpoint's API."""
+    endpoints = cluster.endpoints(refresh=True)
+    cluster.api()
+    return f"{sum(e['Up'] for e in endpoints)}/{len(endpoints)} endpoints up"
+
+
+# Not configured means not used: don't report it as down or keep /health at 503 for it
+if PORTAINER_URL and PORTAINER_ACCESS_TOKEN:
+    backends.register("portainer", check_portainer)
+
+
+# ---------------- Deployment jobs ----------------
+
+DEPLOY_MAX_CONCURRENT = int(os.getenv("DEPLOY_MAX_CONCURRENT", "2"))
+DEPLOY_HISTORY_SIZE = 50
+PULL_DONE_STATUSES = ("Pull complete", "Already exists")
+
+
+class DeploymentManager:
+    """
+    Runs deploy_latest_image jobs on a bounded pool and keeps their status.
+
+    Only one job per container can be queued or running at a time; finished
+    jobs are kept for DEPLOY_HISTORY_SIZE entries.
+    """
+
+    def __init__(self, max_workers=DEPLOY_MAX_CONCURRENT):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deploy")
+        self.jobs = OrderedDict()
+        self.active = {}
+        self.lock = threading.Lock()
+
+    def submit(self, container_name, api):
+        """Returns (job, created); an already active job for the container is returned with created=False."""
+        container_name = container_name.strip("/")
+        key = (api.endpoint_id, container_name)
+        with self.lock:
+            job_id = self.active.get(key)
+            if job_id:
+                return self._snapshot(self.jobs[job_id]), False
+            job = {
+                "id": uuid.uuid4().hex[:8],
+                "container": container_name,
+                "endpoint": api.endpoint_name,
+                "key": key,
+                "api": api,
+                "status": "queued",
+                "created": time.time(),
+                "started": None,
+                "finished": None,
+                "error": None,
+                "layers": {},
+            }
+            self.jobs[job["id"]] = job
+            self.active[key] = job["id"]
+            while len(self.jobs) > DEPLOY_HISTORY_SIZE:
+                oldest = next(iter(self.jobs))
+                if self.jobs[oldest]["finished"] is None:
+                    break
+                self.jobs.popitem(last=False)
+        self.executor.submit(self._run, job)
+        return self._snapshot(job), True
+
+    def _run(self, job):
+        def on_phase(phase):
+            with self.lock:
+                job["status"] = phase
+
+        def on_progress(message):
+            if not message.get("id"):
+                return
+            detail = message.get("progressDetail") or {}
+            with self.lock:
+                layer = job["layers"].setdefault(message["id"], {})
+                layer["status"] = message.get("status", "")
+                if detail.get("total"):
+                    layer["current"], layer["total"] = detail.get("current", 0), detail["total"]
+
+        job["started"] = time.time()
+        try:
+            job["api"].deploy_latest_image(job["container"], on_progress=on_progress, on_phase=on_phase)
+            status, error = "done", None
+            print(f"✅ Update of container '{job['container']}' completed successfully")
+        except Exception as e:
+            status, error = "failed", str(e)
+            print(f"❌ Error updating container '{job['container']}': {e}")
+        with self.lock:
+            job.update(status=status, error=error, finished=time.time())
+            self.active.pop(job["key"], None)
+
+    @staticmethod
+    def _snapshot(job):
+        layers = job["layers"].values()
+        downloading = [l for l in layers if l.get("total") and l["status"] == "Downloading"]
+        return {
+            "id": job["id"],
+            "container": job["container"],
+            "endpoint": job["endpoint"],
+            "status": job["status"],
+            "error": job["error"],
+            "created": datetime.fromtimestamp(job["created"]).strftime("%d.%m.%Y %H:%M:%S"),
+            "elapsed_seconds": round((job["finished"] or time.time()) - (job["started"] or job["created"]), 1),
+            "layers_done": sum(1 for l in layers if l["status"] in PULL_DONE_STATUSES),
+            "layers_total": len(job["layers"]),
+            "downloading_bytes": [sum(l["current"] for l in downloading), sum(l["total"] for l in downloading)],
+        }
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def recent(self, limit=10):
+        with self.lock:
+            return [self._snapshot(j) for j in reversed(list(self.jobs.values())[-limit:])]
+
+
+deployments = DeploymentManager()
 
 def register_tools(mcp):
+    async def endpoint_api(endpoint):
+        return await run_blocking("portainer", cluster.api, endpoint)
+
+    async def endpoint_apis(endpoint):
+        return await run_blocking("portainer", cluster.apis, endpoint)
+
+    @mcp.tool()
+    async def test_portainer_connection() -> str:
+        """Test connection to Portainer and return the available endpoints."""
+        endpoints = await run_blocking("portainer", cluster.endpoints, True)
+        names = ", ".join(f"{e['Name']} (ID {e['Id']})" for e in endpoints)
+        default = await endpoint_api("")
+        return f"Connected to Portainer. Default endpoint ID: {default.endpoint_id}. Endpoints: {names}"
+
+    @mcp.tool()
+    async def list_portainer_endpoints() -> str:
+        """List the Docker endpoints (hosts) managed by Portainer, with their ID and up/down state."""
+        endpoints = await run_blocking("portainer", cluster.endpoints, True)
+        return "\n".join(f"{e['Name']} | ID {e['Id']} | {'up' if e['Up'] else 'down'}" for e in endpoints)
+
     @mcp.tool()
-    def test_portainer_connection() -> str:
-        """Test connection to Portainer and return the endpoint ID."""
-        return f"Connected to Portainer. Endpoint ID: {portainer.endpoint_id}"
+    async def find_container(container_name: str) -> str:
+        """Find which endpoint(s) run a container with this name, searching all endpoints concurrently."""
+        async def lookup(api):
+            try:
+                filters = {"name": [f"^/{container_name.strip('/')}$"]}
+                containers = await run_blocking("portainer", api.list_containers, True, filters)
+                return [f"{api.endpoint_name} | {', '.join(c['Names'])} | {c['Status']}" for c in containers]
+            except Exception as e:
+                return [f"{api.endpoint_name} | ❌ {e}"]
+
+        results = await asyncio.gather(*[lookup(api) for api in await endpoint_apis("all")])
+        lines = [line for endpoint_lines in results for line in endpoint_lines]
+        return "\n".join(lines) if lines else f"Container '{container_name}' not found on any endpoint"
 
     @mcp.tool()
-    def list_containers(all_containers: bool = False) -> str:
-        """List containers, optionally including stopped ones."""
-        containers = portainer.list_containers(all_containers)
-        return "\n".join([f"{', '.join(c['Names'])} | {c['Status']}" for c in containers])
+    async def list_containers(all_containers: bool = False, status: str = "", label: str = "", name: str = "",
+                              endpoint: str = "") -> str:
+        """
+        List containers, optionally including stopped ones.
+
+        Filters are applied on the Docker side: status (e.g. "running", "exited"),
+        label ("key" or "key=value") and name (substring match).
+        endpoint: Portainer endpoint name or ID, "all" to list every endpoint concurrently;
+        the first endpoint if empty.
+        """
+        filters = {}
+        if status:
+            filters["status"] = [status]
+        if label:
+            filters["label"] = [label]
+        if name:
+            filters["name"] = [name]
+        apis = await endpoint_apis(endpoint)
+
+        async def list_endpoint(api):
+            # Filtering by status only makes sense across stopped containers too
+            try:
+                containers = await run_blocking("portainer", api.list_containers, all_containers or bool(status), filters)
+            except Exception as e:
+                # One unreachable endpoint shouldn't fail a cluster-wide listing
+                if len(apis) == 1:
+                    raise
+                return [f"[{api.endpoint_name}] ❌ {e}"]
+            prefix = f"[{api.endpoint_name}] " if len(apis) > 1 else ""
+            return [f"{prefix}{', '.join(c['Names'])} | {c['Status']}" for c in containers]
+
+        results = await asyncio.gather(*[list_endpoint(api) for api in apis])
+        return "\n".join(line for endpoint_lines in results for line in endpoint_lines)
 
     @mcp.tool()
-    def get_container_status(container_name: str) -> str:
-        """Get the state/status of a specific container."""
-        state = portainer.get_container_status(container_name)
+    async def get_container_status(container_name: str, endpoint: str = "") -> str:
+        """Get the state/status of a specific container. endpoint: Portainer endpoint name or ID (first if empty)."""
+        api = await endpoint_api(endpoint)
+        state = await run_blocking("portainer", api.get_container_status, container_name)
         return str(state)
 
     @mcp.tool()
-    def get_container_logs(container_name: str, lines: int = 50) -> str:
-        """Fetch last N lines of logs from a container."""
-        return portainer.get_container_logs(container_name, lines)
+    async def get_container_logs(container_name: str, lines: int = 50, endpoint: str = "") -> str:
+        """Fetch last N lines of logs from a container. endpoint: Portainer endpoint name or ID (first if empty)."""
+        api = await endpoint_api(endpoint)
+        return await run_blocking("portainer", api.get_container_logs, container_name, lines)
 
     @mcp.tool()
-    def restart_container(container_name: str) -> str:
-        """Restart the specified container."""
-        portainer.restart_container(container_name)
+    async def follow_container_logs(container_name: str, cursor: str = "", since: str = "", until: str = "",
+                                    tail: int = 100, max_bytes: int = DEFAULT_LOG_BYTE_BUDGET,
+                                    timestamps: bool = False, endpoint: str = "") -> Dict[str, Any]:
+        """
+        Fetch container logs incrementally; pass the returned cursor back to get only new lines.
+
+        Use this to watch a deploy or a crash loop without re-reading the same lines.
+        stderr lines are prefixed with 'E '. Each response holds at most max_bytes of log text;
+        if 'truncated' is true, call again with the cursor to continue.
+
+        Args:
+            container_name: container to read
+            cursor: cursor from a previous call; overrides since/tail
+            since: start time on the first call: unix timestamp, ISO date, or age like '15m', '2h'
+            until: end time, same formats as since
+            tail: number of most recent lines on the first call when no since is given
+            max_bytes: byte budget for the returned log text
+            timestamps: include each line's timestamp
+            endpoint: Portainer endpoint name or ID; the first endpoint if empty
+
+        Returns:
+            {"logs": str, "lines": int, "cursor": str, "truncated": bool}
+        """
+        if cursor:
+            since_ts, _, skip = cursor.partition("|")
+            kwargs = {"since": since_ts, "skip": int(skip or 0), "tail": "all"}
+        else:
+            kwargs = {"since": to_docker_time(since), "tail": "all" if since else tail}
+        kwargs["until"] = to_docker_time(until)
+
+        api = await endpoint_api(endpoint)
+        result = await run_blocking("portainer", api.read_container_logs, container_name,
+                                    max_bytes=max_bytes, **kwargs)
+        lines = result["lines"]
+
+        if lines:
+            last_ts = lines[-1][0]
+            same = sum(1 for ts, _, _ in lines if ts == last_ts)
+            if cursor and last_ts == kwargs["since"]:
+                same += kwargs["skip"]
+            next_cursor = f"{last_ts}|{same}"
+        else:
+            next_cursor = cursor or (f"{kwargs['since']}|0" if kwargs["since"] else f"{int(time.time())}|0")
+
+        text = "\n".join(
+            f"{f'{ts} ' if timestamps else ''}{'E ' if stream == 'stderr' else ''}{line}" for ts, stream, line in lines
+        )
+        return {"logs": text, "lines": len(lines), "cursor": next_cursor, "truncated": result["truncated"]}
+
+    @mcp.tool()
+    async def restart_container(container_name: str, endpoint: str = "") -> str:
+        """Restart the specified container. endpoint: Portainer endpoint name or ID (first if empty)."""
+        api = await endpoint_api(endpoint)
+        await run_blocking("portainer", api.restart_container, container_name)
         return f"🔄 Container '{container_name}' restarted"
 
     @mcp.tool()
-    def stop_container(container_name: str) -> str:
-        """Stop the specified container."""
-        portainer.stop_container(container_name)
+    async def stop_container(container_name: str, endpoint: str = "") -> str:
+        """Stop the specified container. endpoint: Portainer endpoint name or ID (first if empty)."""
+        api = await endpoint_api(endpoint)
+        await run_blocking("portainer", api.stop_container, container_name)
         return f"🛑 Container '{container_name}' stopped"
 
     @mcp.tool()
-    def start_container(container_name: str) -> str:
-        """Start the specified container."""
-        portainer.start_container(container_name)
+    async def start_container(container_name: str, endpoint: str = "") -> str:
+        """Start the specified container. endpoint: Portainer endpoint name or ID (first if empty)."""
+        api = await endpoint_api(endpoint)
+        await run_blocking("portainer", api.start_container, container_name)
         return f"▶ Container '{container_name}' started"
 
-    def deploy_latest_background(container_name):
+    @mcp.tool()
+    async def bulk_container_action(action: str, container_names: Optional[List[str]] = None, label: str = "",
+                                    compose_project: str = "", max_concurrency: int = BULK_MAX_CONCURRENCY,
+                                    endpoint: str = "") -> str:
+        """
+        Start, stop or restart many containers at once.
+
+        Containers are selected by explicit names, a label selector ("key" or "key=value")
+        and/or a docker compose project name; the union of all selectors is used.
+        Actions run concurrently, at most max_concurrency at a time.
+        endpoint: Portainer endpoint name or ID; the first endpoint if empty.
+        """
+        if action not in BULK_ACTIONS:
+            return f"❌ Unknown action '{action}'. Use one of: {', '.join(BULK_ACTIONS)}"
+        if not (container_names or label or compose_project):
+            return "❌ Provide container_names, label or compose_project"
         try:
-            portainer.deploy_latest_image(container_name)
-            print(f"✅ Update of container '{container_name}' completed successfully")
-            # Optional: update status or send notification here
-        except Exception as e:
-            print(f"❌ Error updating container '{container_name}': {e}")
+            api = await endpoint_api(endpoint)
+            targets, missing = await run_blocking("portainer", api.find_containers, container_names, label,
+                                                  compose_project)
+        except ValueError as e:
+            return f"❌ {e}"
+        not_found = [f"❌ {name}: container not found" for name in missing]
+        if not targets:
+            return "\n".join(not_found) or "No matching containers."
+
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def run(name, container_id):
+            async with semaphore:
+                try:
+                    await run_blocking("portainer", api.container_action, container_id, action)
+                    return f"{BULK_ACTIONS[action]} {name}"
+                except Exception as e:
+                    return f"❌ {name}: {e}"
+
+        results = await asyncio.gather(*[run(n, cid) for n, cid in targets.items()])
+        return "\n".join(results + not_found)
+
+    # endpoint ID -> (time, rows)
+    stats_cache = {}
+
+    async def collect_container_stats(api, semaphore):
+        cached = stats_cache.get(api.endpoint_id)
+        if cached and time.monotonic() - cached[0] < STATS_CACHE_TTL:
+            return cached[1]
+        containers = await run_blocking("portainer", api.list_containers, False)
+
+        async def sample(c):
+            name = c["Names"][0].strip("/")
+            async with semaphore:
+                try:
+                    stats = await run_blocking("portainer", api.get_container_stats, c["Id"])
+                    return {**summarize_container_stats(name, stats), "endpoint": api.endpoint_name}
+                except Exception as e:
+                    return {"name": name, "endpoint": api.endpoint_name, "error": str(e)}
+
+        rows = await asyncio.gather(*[sample(c) for c in containers])
+        stats_cache[api.endpoint_id] = (time.monotonic(), rows)
+        return rows
+
+    @mcp.tool()
+    async def get_container_stats(sort_by: str = "cpu", limit: int = 10, endpoint: str = "") -> str:
+        """
+        Show CPU, memory and network usage of all running containers, heaviest first.
+
+        Stats for all containers are fetched concurrently; results are cached for a few
+        seconds so follow-up questions don't trigger another fan-out.
+
+        Args:
+            sort_by: "cpu", "mem" or "net" (rx + tx bytes)
+            limit: number of containers to show
+            endpoint: Portainer endpoint name or ID, "all" for every endpoint; the first endpoint if empty
+        """
+        keys = {
+            "cpu": lambda r: r.get("cpu_percent", -1),
+            "mem": lambda r: r.get("mem_bytes", -1),
+            "net": lambda r: r.get("net_rx_bytes", -1) + r.get("net_tx_bytes", 0),
+        }
+        if sort_by not in keys:
+            return f"❌ Unknown sort_by '{sort_by}'. Use one of: {', '.join(keys)}"
+        apis = await endpoint_apis(endpoint)
+        semaphore = asyncio.Semaphore(STATS_MAX_CONCURRENCY)
+
+        async def endpoint_stats(api):
+            try:
+                return await collect_container_stats(api, semaphore), []
+            except Exception as e:
+                # One unreachable endpoint shouldn't fail a cluster-wide query
+                if len(apis) == 1:
+                    raise
+                return [], [f"[{api.endpoint_name}] ❌ {e}"]
+
+        per_endpoint = await asyncio.gather(*[endpoint_stats(api) for api in apis])
+        rows = sorted([r for endpoint_rows, _ in per_endpoint for r in endpoint_rows], key=keys[sort_by], reverse=True)
+        endpoint_errors = [line for _, errors in per_endpoint for line in errors]
+        if not rows:
+            return "\n".join(endpoint_errors) or "No running containers."
+
+        lines = ["NAME | CPU% | MEM | MEM% | NET RX/TX"]
+        for r in rows[:limit]:
+            name = f"[{r['endpoint']}] {r['name']}" if len(apis) > 1 else r["name"]
+            if "error" in r:
+                lines.append(f"{name} | ❌ {r['error']}")
+            else:
+                lines.append(f"{name} | {r['cpu_percent']}% | {format_bytes(r['mem_bytes'])} | {r['mem_percent']}% | "
+                             f"{format_bytes(r['net_rx_bytes'])}/{format_bytes(r['net_tx_bytes'])}")
+        return "\n".join(lines + endpoint_errors)
+
+    @mcp.tool()
+    async def deploy_latest(container_name: str, endpoint: str = "") -> str:
+        """
+        Start updating the container with the latest image asynchronously.
+
+        Returns a job ID to pass to get_deployment_status. If a deployment of the same
+        container is already queued or running, its job ID is returned instead of starting another.
+        endpoint: Portainer endpoint name or ID; the first endpoint if empty.
+        """
+        api = await endpoint_api(endpoint)
+        job, created = deployments.submit(container_name, api)
+        if not created:
+            return f"⏳ Update of container '{container_name}' already in progress (job {job['id']}, {job['status']})"
+        return f"🚀 Update of container '{container_name}' started in background (job {job['id']})"
 
     @mcp.tool()
-    def deploy_latest(container_name: str) -> str:
-        """Start updating the container with the latest image asynchronously."""
-        thread = threading.Thread(target=deploy_latest_background, args=(container_name,))
-        thread.start()
-        return f"🚀 Update of container '{container_name}' started in background"
+    def get_deployment_status(job_id: str = "") -> Any:
+        """
+        Get the status and image-pull progress of a deployment job, or of recent jobs if no ID is given.
+
+        Status is one of queued, pulling, recreating, done, failed.
+        """
+        if job_id:
+            job = deployments.get(job_id)
+            return job if job else f"❌ Unknown deployment job '{job_id}'"
+        return deployments.recent()
@@ -0,0 +1,164 @@
+import os
+import re
+import bisect
+import threading
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
+from config_registry import config_registry
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ENTITIES_MAP_FILE = os.path.join(BASE_DIR, 'entities_map.json')
+
+# How much a match in each field counts towards an entity's score
+FIELD_WEIGHTS = {"EntityId": 3.0, "Name": 3.0, "Alias": 2.5, "Domain": 2.0, "Room": 1.5, "Hint": 1.0}
+PREFIX_MATCH_FACTOR = 0.8
+FUZZY_MATCH_FACTOR = 0.6
+FUZZY_MIN_SIMILARITY = 0.45
+
+# Hebrew final letters -> regular forms, so "מזגן" and "מזגנים" share trigrams
+FINAL_LETTERS = str.maketrans("ךםןףץ", "כמנפצ")
+# One-letter Hebrew prefixes: ה (the), ב (in), ל (to), ו (and), מ (from), ש (that), כ (as)
+HEBREW_PREFIXES = "הבלומשכ"
+TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+HEBREW_RE = re.compile(r"[\u0590-\u05FF]")
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Lowercases, splits on punctuation/underscores/dots and adds Hebrew forms without a prefix letter."""
+    tokens = []
+    for token in TOKEN_RE.findall(str(text).lower()):
+        token = token.translate(FINAL_LETTERS)
+        tokens.append(token)
+        if HEBREW_RE.match(token) and len(token) > 3 and token[0] in HEBREW_PREFIXES:
+            tokens.append(token[1:])
+    return tokens
+
+
+def trigrams(token: str) -> set:
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class EntityIndex:
+    """Inverted index over entity IDs, names, aliases, hints, rooms and domains."""
+
+    def __init__(self, entities: List[Dict[str, Any]]):
+        self.entities = entities
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.token_trigrams: Dict[str, set] = {}
+        self.trigram_tokens: Dict[str, set] = defaultdict(set)
+        for idx, entity in enumerate(entities):
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in normalize_tokens(" ".join(self._field_values(entity, field))):
+                    if self.postings[token].get(idx, 0) < weight:
+                        self.postings[token][idx] = weight
+        self.vocabulary = sorted(self.postings)
+        for token in self.vocabulary:
+            grams = trigrams(token)
+            self.token_trigrams[token] = grams
+            for gram in grams:
+                self.trigram_tokens[gram].add(token)
+
+    @staticmethod
+    def _field_values(entity: Dict[str, Any], field: str) -> List[str]:
+        if field == "Domain":
+            return [entity.get("EntityId", "").split(".")[0]]
+        value = entity.get(field)
+        if value is None:
+            return []
+        return value if isinstance(value, list) else [value]
+
+    def _expand(self, token: str) -> Dict[str, float]:
+        """Returns index tokens matching a query token: exact, then prefix, then trigram fuzzy."""
+        if token in self.postings:
+            return {token: 1.0}
+        matches = {}
+        if len(token) >= 2:
+            i = bisect.bisect_left(self.vocabulary, token)
+            while i < len(self.vocabulary) and self.vocabulary[i].startswith(token):
+                matches[self.vocabulary[i]] = PREFIX_MATCH_FACTOR
+                i += 1
+        if matches:
+            return matches
+        grams = trigrams(token)
+        candidates = set()
+        for gram in grams:
+            candidates |= self.trigram_tokens.get(gram, set())
+        for candidate in candidates:
+            other = self.token_trigrams[candidate]
+            similarity = len(grams & other) / len(grams | other)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                matches[candidate] = FUZZY_MATCH_FACTOR * similarity
+        return matches
+
+    def search(self, query: str, domain: str = "", room: str = "", limit: int = 10,
+               offset: int = 0) -> Dict[str, Any]:
+        scores: Dict[int, float] = defaultdict(float)
+        for token in dict.fromkeys(normalize_tokens(query)):
+            best: Dict[int, float] = {}
+            for match, factor in self._expand(token).items():
+                for idx, weight in self.postings[match].items():
+                    best[idx] = max(best.get(idx, 0), weight * factor)
+            for idx, score in best.items():
+                scores[idx] += score
+
+        if not query.strip():
+            scores = {idx: 0.0 for idx in range(len(self.entities))}
+
+        room_tokens = set(normalize_tokens(room))
+        results = []
+        for idx, score in scores.items():
+            entity = self.entities[idx]
+            entity_id = entity.get("EntityId", "")
+            if domain and entity_id.split(".")[0] != domain:
+                continue
+            if room_tokens and not room_tokens & set(normalize_tokens(entity.get("Room", ""))):
+                continue
+            results.append((score, entity_id, entity))
+        results.sort(key=lambda r: (-r[0], r[1]))
+
+        page = results[offset:offset + limit]
+        return {
+            "total": len(results),
+            "offset": offset,
+            "results": [
+                {"EntityId": e.get("EntityId"), "Name": e.get("Name"), "Room": e.get("Room"), "score": round(s, 2)}
+                for s, _, e in page
+            ],
+        }
+
+
+_index: Optional[EntityIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_entity_index() -> EntityIndex:
+    """Returns the index for the current entities_map.json, rebuilding it when the file is reloaded."""
+    global _index
+    entities = config_registry.get(ENTITIES_MAP_FILE, validator=lambda e: isinstance(e, list)) or []
+    if _index is None or _index.entities is not entities:
+        with _index_lock:
+            if _index is None or _index.entities is not entities:
+                _index = EntityIndex(entities)
+    return _index
+
+
+def register_tools(mcp):
+
+    @mcp.tool()
+    def search_entities(query: str, domain: str = "", room: str = "", limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+        """
+        Searches Home Assistant entities by name, alias, hint, room, domain or entity ID.
+
+        Prefer this over getAllEntities to find the entity ID before performing an action.
+        Matching is token based and tolerant of typos and Hebrew prefixes (e.g. 'המזגן',
+        'במטבח') and works in Hebrew or English.
+
+        :param query: Free text, e.g. "אור מטבח", "bedroom ac", "מזגן".
+        :param domain: Optional domain filter (e.g. "light", "switch", "climate").
+        :param room: Optional room filter (e.g. "סלון").
+        :param limit: Maximum number of results to return.
+        :param offset: Number of results to skip, for paging.
+        :returns: {"total", "offset", "results": [{"EntityId", "Name", "Room", "score"}]} best match first.
+        """
+        return get_entity_index().search(query, domain, room, limit, offset)
@@ -1,6 +1,6 @@
 import os
-import json
 from datetime import datetime
+from config_registry import config_registry
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CHECKS_FILE = os.path.join(BASE_DIR, 'checks.json')
@@ -25,16 +25,11 @@ def register_tools(mcp):
 
    # --- Helper to load or create checks.json ---
     def get_system_checks(config_file: str = CHECKS_FILE):
-        if not os.path.exists(config_file):
-            with open(config_file, "w") as f:
-                json.dump([
-                    "Check all containers and return inactive ones",
-                    "Check disk space and report if below threshold",
-                    "Check important services and restart if not running"
-                ], f, indent=2)
-        with open(config_file, "r") as f:
-            checks = json.load(f)
-        return checks
+        return config_registry.get(config_file, default=[
+            "Check all containers and return inactive ones",
+            "Check disk space and report if below threshold",
+            "Check important services and restart if not running"
+        ], validator=lambda c: isinstance(c, list))
 
     @mcp.tool()
     def system_optimizer() -> dict:
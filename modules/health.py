@@ -0,0 +1,19 @@
+from typing import Any, Dict
+from backend_health import backends
+
+
+def register_tools(mcp):
+
+    @mcp.tool()
+    def get_backend_health() -> Dict[str, Any]:
+        """
+        Shows whether each backend (Portainer, Home Assistant, ...) is ready.
+
+        Backends that are down are retried in the background with backoff; use this to tell
+        a backend outage apart from a tool error, and to see when the next retry happens.
+
+        :returns: {"ready": bool, "backends": {name: {"state", "detail", "error", "attempts",
+                  "since", "last_ok", "next_attempt"}}}; state is pending, ready or down.
+        """
+        snapshot = backends.snapshot()
+        return {"ready": all(b["state"] == "ready" for b in snapshot.values()), "backends": snapshot}
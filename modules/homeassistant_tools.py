@@ -1,10 +1,19 @@
 import os
 import requests
 import json
+import threading
+import time
+from websockets.sync.client import connect as ws_connect
 from dotenv import load_dotenv
 load_dotenv()
-from typing import Optional, Dict, Any, List
+import asyncio
+from typing import Optional, Dict, Any, List, Tuple
+from config_registry import config_registry
+from http_client import get_session
+from backend_executor import run_blocking
+from backend_health import backends
 
+TOOL_BACKEND = "homeassistant"  # label for tool metrics
 HOMEASSISTANT_URL = os.getenv('HOMEASSISTANT_URL')
 HOMEASSISTANT_TOKEN = os.getenv('HOMEASSISTANT_TOKEN')
 
@@ -16,14 +25,175 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
-if not HOMEASSISTANT_URL or not HOMEASSISTANT_TOKEN:
-    print("Error: Missing HOMEASSISTANT_URL or HOMEASSISTANT_TOKEN environment variables.")
-    exit(1)
+session = get_session("homeassistant")
+
+# Tools still register without credentials, so the rest of the server keeps working; calls just fail
+HOMEASSISTANT_CONFIGURED = bool(HOMEASSISTANT_URL and HOMEASSISTANT_TOKEN)
+if not HOMEASSISTANT_CONFIGURED:
+    print("⚠ Missing HOMEASSISTANT_URL or HOMEASSISTANT_TOKEN environment variables; Home Assistant tools are disabled.")
+
+# ---------------- WebSocket State Mirror ----------------
+
+class HomeAssistantStateMirror:
+    """
+    Keeps an in-memory copy of every entity state, fed by the Home Assistant WebSocket API.
+
+    On connect it subscribes to state_changed, loads a full get_states snapshot and then
+    applies each event. 'ready' is only set while the mirror is connected and in sync,
+    so readers know when to fall back to REST.
+    """
+
+    def __init__(self, url: str, token: str):
+        self.ws_url = url.rstrip("/").replace("https://", "wss://", 1).replace("http://", "ws://", 1) + "/api/websocket"
+        self.token = token
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self.ready = False
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _compact(state: Dict[str, Any]) -> Dict[str, Any]:
+        # 'context' is per-change bookkeeping nobody reads; dropping it keeps the store small
+        return {k: v for k, v in state.items() if k != "context"}
+
+    def get(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        return self.states.get(entity_id)
+
+    def _apply_event(self, data: Dict[str, Any]):
+        entity_id = data.get("entity_id")
+        new_state = data.get("new_state")
+        with self.lock:
+            if new_state is None:
+                self.states.pop(entity_id, None)
+            else:
+                self.states[entity_id] = self._compact(new_state)
+
+    def _sync(self):
+        with ws_connect(self.ws_url, open_timeout=10, max_size=32 * 1024 * 1024) as ws:
+            json.loads(ws.recv())  # auth_required
+            ws.send(json.dumps({"type": "auth", "access_token": self.token}))
+            auth = json.loads(ws.recv())
+            if auth.get("type") != "auth_ok":
+                raise ConnectionError(f"Home Assistant WebSocket auth failed: {auth.get('message', auth)}")
+
+            # Subscribe before the snapshot so no change falls in between; buffer events until it lands
+            ws.send(json.dumps({"id": 1, "type": "subscribe_events", "event_type": "state_changed"}))
+            ws.send(json.dumps({"id": 2, "type": "get_states"}))
+            pending_events = []
+            for raw in ws:
+                message = json.loads(raw)
+                if message.get("type") == "event":
+                    data = message["event"]["data"]
+                    if self.ready:
+                        self._apply_event(data)
+                    else:
+                        pending_events.append(data)
+                elif message.get("type") == "result" and message.get("id") == 2:
+                    if not message.get("success"):
+                        raise ConnectionError(f"get_states failed: {message.get('error')}")
+                    snapshot = {s["entity_id"]: self._compact(s) for s in message["result"]}
+                    with self.lock:
+                        self.states = snapshot
+                    for data in pending_events:
+                        self._apply_event(data)
+                    pending_events.clear()
+                    self.ready = True
+                    print(f"✅ [HA Mirror] Synced {len(snapshot)} entities")
+
+    def _run(self):
+        backoff = 1
+        while True:
+            started = time.monotonic()
+            try:
+                self._sync()
+            except Exception as e:
+                print(f"❌ [HA Mirror] Disconnected: {e}")
+            self.ready = False
+            if time.monotonic() - started > 60:
+                backoff = 1
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name="ha-state-mirror", daemon=True)
+        self.thread.start()
+
+
+state_mirror = HomeAssistantStateMirror(HOMEASSISTANT_URL or "", HOMEASSISTANT_TOKEN)
+
+def check_home_assistant():
+    """Readiness check: a REST round trip, plus whether the WebSocket mirror is in sync."""
+    response = session.get(f"{HOMEASSISTANT_URL}/api/", headers=HEADERS)
+    response.raise_for_status()
+    return f"state mirror {'synced' if state_mirror.ready else 'connecting'}"
+
+# Not configured means not used: don't report it as down or keep /health at 503 for it
+if HOMEASSISTANT_CONFIGURED:
+    backends.register("homeassistant", check_home_assistant)
+
+def start_scheduler(mcp):
+    # The mirror connects on its own thread, so an unreachable Home Assistant doesn't hold up startup
+    if HOMEASSISTANT_CONFIGURED:
+        state_mirror.start()
+
+def fetch_entity_state(entity_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        url = f"{HOMEASSISTANT_URL}/api/states/{entity_id}"
+        response = session.get(url, headers=HEADERS)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        print(f"Error getting state: {e}")
+        return None
+
+def post_service(domain: str, service: str, service_data: Dict[str, Any]) -> Tuple[bool, str]:
+    url = f"{HOMEASSISTANT_URL}/api/services/{domain}/{service}"
+
+    try:
+        response = session.post(
+            url,
+            headers=HEADERS,
+            data=json.dumps(service_data)
+        )
+        response.raise_for_status()
+        return True, response.text
+    except requests.exceptions.RequestException as e:
+        return False, str(e)
+
+def call_service(domain: str, service: str, service_data: Dict[str, Any]) -> str:
+    ok, message = post_service(domain, service, service_data)
+    if ok:
+        return f"Service call {domain}.{service} sent successfully. Response: {message}"
+    return f"Error sending service call: {message}"
+
+def merge_service_calls(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Groups calls that share domain, service and extra data into one call with a list of entity_ids.
+
+    Each group keeps the indices of the original items so results can be mapped back.
+    Calls without an entity_id are never merged.
+    """
+    groups: Dict[Any, Dict[str, Any]] = {}
+    for index, call in enumerate(calls):
+        data = dict(call.get("service_data") or {})
+        entity_ids = data.pop("entity_id", None)
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+        key = (call["domain"], call["service"], json.dumps(data, sort_keys=True)) if entity_ids else index
+        group = groups.setdefault(key, {"domain": call["domain"], "service": call["service"],
+                                        "data": data, "entity_ids": [], "indices": []})
+        for entity_id in entity_ids or []:
+            if entity_id not in group["entity_ids"]:
+                group["entity_ids"].append(entity_id)
+        group["indices"].append(index)
+    return list(groups.values())
 
 def register_tools(mcp):
 
     @mcp.tool()
-    def get_home_assistant_entity_state(entity_id: str) -> Optional[Dict[str, Any]]:
+    async def get_home_assistant_entity_state(entity_id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieves the current state of a specific Home Assistant entity.
         This can be used to get the status of a light, the temperature of a sensor, etc.
@@ -31,14 +201,9 @@ def register_tools(mcp):
         :param entity_id: The full entity ID (e.g., "light.living_room", "sensor.kitchen_temperature").
         :returns: A dictionary containing the entity's state data, or None if an error occurred.
         """
-        try:
-            url = f"{HOMEASSISTANT_URL}/api/states/{entity_id}"
-            response = requests.get(url, headers=HEADERS)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error getting state: {e}")
-            return None
+        if state_mirror.ready:
+            return state_mirror.get(entity_id)
+        return await run_blocking("homeassistant", fetch_entity_state, entity_id)
 
 
     @mcp.tool()
@@ -66,25 +231,21 @@ def register_tools(mcp):
         """
         Retrieves a complete list of all configured Home Assistant entities.
 
-        This is the primary tool for the AI to get a full overview of all
-        available devices, including their names, aliases, rooms, and types.
-        The AI should use this to find the correct entity ID before performing
-        an action.
+        Use this only when a full overview of all available devices is needed.
+        To find the correct entity ID before performing an action, prefer
+        search_entities, which returns only the best matches.
 
         :returns: A list of dictionaries, where each dictionary represents an entity.
         """
-        print(f"ENTITIES_MAP_FILE: {ENTITIES_MAP_FILE}")
-        try:
-            with open(ENTITIES_MAP_FILE, encoding='utf-8') as f:
-                entities = json.load(f)
-            return entities
-        except (FileNotFoundError, json.JSONDecodeError):
+        entities = config_registry.get(ENTITIES_MAP_FILE, validator=lambda e: isinstance(e, list))
+        if entities is None:
             print(f"Error: Could not find or read the file at {ENTITIES_MAP_FILE}")
             return []
+        return entities
 
 
     @mcp.tool()
-    def send_home_assistant_service_call(domain: str, service: str, service_data: Dict[str, Any]) -> str:
+    async def send_home_assistant_service_call(domain: str, service: str, service_data: Dict[str, Any]) -> str:
         """
         Calls a Home Assistant service to control a device.
 
@@ -97,15 +258,45 @@ def register_tools(mcp):
         :param service_data: A dictionary with service-specific data (e.g., {"entity_id": "light.living_room"}).
         :returns: A string indicating the status of the service call.
         """
-        url = f"{HOMEASSISTANT_URL}/api/services/{domain}/{service}"
-
-        try:
-            response = requests.post(
-                url,
-                headers=HEADERS,
-                data=json.dumps(service_data)
-            )
-            response.raise_for_status()
-            return f"Service call {domain}.{service} sent successfully. Response: {response.text}"
-        except requests.exceptions.RequestException as e:
-            return f"Error sending service call: {e}"
\ No newline at end of file
+        return await run_blocking("homeassistant", call_service, domain, service, service_data)
+
+    @mcp.tool()
+    async def send_home_assistant_service_calls(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Sends many Home Assistant service calls in one tool call.
+
+        Use this for multi-device requests such as "turn off all the lights and set the
+        AC to 24". Calls with the same domain, service and extra data are merged into a
+        single call with a list of entity_ids, and the resulting groups are sent concurrently.
+
+        :param calls: A list of {"domain", "service", "service_data"} items, e.g.
+                      [{"domain": "light", "service": "turn_off", "service_data": {"entity_id": "light.kitchen"}},
+                       {"domain": "climate", "service": "set_temperature",
+                        "service_data": {"entity_id": "climate.bedroom_ac", "temperature": 24}}]
+        :returns: One result per input item, in order: {"index", "domain", "service", "entity_id", "success", "message"}.
+        """
+        invalid = {i for i, c in enumerate(calls) if not c.get("domain") or not c.get("service")}
+        groups = merge_service_calls([c for i, c in enumerate(calls) if i not in invalid])
+        valid_indices = [i for i in range(len(calls)) if i not in invalid]
+
+        outcomes = await asyncio.gather(*[
+            run_blocking("homeassistant", post_service, g["domain"], g["service"],
+                         {**g["data"], "entity_id": g["entity_ids"]} if g["entity_ids"] else g["data"])
+            for g in groups
+        ])
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+        for i in invalid:
+            results[i] = {"index": i, "success": False, "message": "Each call needs 'domain' and 'service'"}
+        for group, (ok, message) in zip(groups, outcomes):
+            for local_index in group["indices"]:
+                index = valid_indices[local_index]
+                results[index] = {
+                    "index": index,
+                    "domain": group["domain"],
+                    "service": group["service"],
+                    "entity_id": (calls[index].get("service_data") or {}).get("entity_id"),
+                    "success": ok,
+                    "message": "sent" if ok else message,
+                }
+        return results
@@ -0,0 +1,185 @@
+import os
+import math
+import threading
+import time
+from array import array
+from typing import Dict, Any, List, Optional
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from modules.remote_metrics import load_env_config, run_metrics_structured
+
+# Samples kept per series; at the default 60s interval this is 24h of history
+HISTORY_CAPACITY = int(os.getenv("METRIC_HISTORY_CAPACITY", "1440"))
+# Upper bound on series per environment so memory stays predictable (mounts/interfaces can grow)
+MAX_SERIES_PER_ENV = int(os.getenv("METRIC_HISTORY_MAX_SERIES", "200"))
+DEFAULT_SAMPLE_INTERVAL = 60
+DEFAULT_SAMPLE_METRICS = ["cpu_load", "memory_usage", "disk_usage", "network"]
+
+# ---------------- Ring Buffer ----------------
+
+class RingBuffer:
+    """Fixed-size, array-backed buffer of (timestamp, value) samples; oldest samples are overwritten."""
+
+    def __init__(self, capacity: int = HISTORY_CAPACITY):
+        self.capacity = capacity
+        self.times = array("d", [0.0]) * capacity
+        self.values = array("d", [0.0]) * capacity
+        self.count = 0
+        self.next = 0
+        self.lock = threading.Lock()
+
+    def append(self, timestamp: float, value: float):
+        with self.lock:
+            self.times[self.next] = timestamp
+            self.values[self.next] = value
+            self.next = (self.next + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def window(self, since: float) -> List[float]:
+        """Returns values with timestamp >= since, oldest first."""
+        with self.lock:
+            start = (self.next - self.count) % self.capacity
+            result = []
+            for i in range(self.count):
+                idx = (start + i) % self.capacity
+                if self.times[idx] >= since:
+                    result.append(self.values[idx])
+            return result
+
+    def latest(self) -> Optional[tuple]:
+        with self.lock:
+            if not self.count:
+                return None
+            idx = (self.next - 1) % self.capacity
+            return self.times[idx], self.values[idx]
+
+# ---------------- History Store ----------------
+
+history: Dict[str, Dict[str, RingBuffer]] = {}
+history_lock = threading.Lock()
+
+def flatten_record(prefix: str, record: Any, out: Dict[str, float]):
+    """Flattens a structured metric record into 'metric.key.subkey' -> number series."""
+    if isinstance(record, bool):
+        return
+    if isinstance(record, (int, float)):
+        out[prefix] = float(record)
+    elif isinstance(record, dict):
+        if "error" in record:
+            return
+        for key, value in record.items():
+            flatten_record(f"{prefix}.{key}", value, out)
+    elif isinstance(record, list):
+        # Only lists with a stable identity per item (disk mounts) make sense as time series
+        for item in record:
+            if isinstance(item, dict) and "mount" in item:
+                flatten_record(f"{prefix}.{item['mount']}", {k: v for k, v in item.items() if k != "mount"}, out)
+
+def record_samples(env_name: str, samples: Dict[str, float], timestamp: float):
+    with history_lock:
+        env_history = history.setdefault(env_name, {})
+        for series, value in samples.items():
+            buffer = env_history.get(series)
+            if buffer is None:
+                if len(env_history) >= MAX_SERIES_PER_ENV:
+                    continue
+                buffer = env_history[series] = RingBuffer()
+            buffer.append(timestamp, value)
+
+def sample_env(env_name: str, metrics: List[str]):
+    config = load_env_config()
+    if env_name not in config:
+        return
+    env_data = config[env_name]
+    allowed = [m for m in metrics if m in env_data.get("metrics", [])]
+    if not allowed:
+        return
+    timestamp = time.time()
+    samples: Dict[str, float] = {}
+    for metric, record in run_metrics_structured(env_data, allowed).items():
+        flatten_record(metric, record, samples)
+    record_samples(env_name, samples, timestamp)
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile over an already sorted list."""
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    ordered = sorted(values)
+    return {
+        "count": len(values),
+        "min": ordered[0],
+        "max": ordered[-1],
+        "avg": round(sum(values) / len(values), 4),
+        "p95": percentile(ordered, 95),
+        "first": values[0],
+        "last": values[-1],
+    }
+
+# ---------------- Sampler ----------------
+
+sampler = BackgroundScheduler()
+
+def start_scheduler(mcp):
+    """Schedules a sampling job for every environment that has a 'sampling' section in env_config.json."""
+    for env_name, env_data in load_env_config().items():
+        sampling = env_data.get("sampling")
+        if not sampling:
+            continue
+        interval = int(sampling.get("interval_seconds", DEFAULT_SAMPLE_INTERVAL))
+        metrics = sampling.get("metrics", DEFAULT_SAMPLE_METRICS)
+        sampler.add_job(sample_env, IntervalTrigger(seconds=interval), args=[env_name, metrics],
+                        id=f"sample:{env_name}", replace_existing=True, max_instances=1, coalesce=True)
+    if sampler.get_jobs() and not sampler.running:
+        sampler.start()
+        print(f"✅ [Metric History] Sampling {len(sampler.get_jobs())} environment(s).")
+
+# ---------------- MCP Tools ----------------
+
+def register_tools(mcp):
+
+    @mcp.tool()
+    def get_metric_history(env_name: str, series: str = "", window_minutes: int = 60) -> Dict[str, Any]:
+        """
+        Returns min/max/avg/p95 over a time window from the in-memory metric history (no SSH).
+
+        Args:
+            env_name (str): environment name from config (must have a 'sampling' section)
+            series (str): series name or prefix, e.g. 'cpu_load.load_1', 'disk_usage./', 'memory_usage';
+                          all series if empty
+            window_minutes (int): how far back to look
+
+        Returns:
+            Dict[str, Any]: series name -> {count, min, max, avg, p95, first, last}
+        """
+        with history_lock:
+            env_history = dict(history.get(env_name, {}))
+        if not env_history:
+            return {"error": f"No history collected for environment '{env_name}'"}
+
+        since = time.time() - window_minutes * 60
+        results = {}
+        for name in sorted(env_history):
+            if series and not (name == series or name.startswith(f"{series}.")):
+                continue
+            values = env_history[name].window(since)
+            if values:
+                results[name] = summarize(values)
+        if not results:
+            return {"error": f"No samples for '{series or env_name}' in the last {window_minutes} minutes"}
+        return results
+
+    @mcp.tool()
+    def list_metric_history_series(env_name: str) -> List[str]:
+        """
+        Lists the metric series that are being sampled for an environment.
+
+        Args:
+            env_name (str): environment name from config
+
+        Returns:
+            List[str]: series names usable with get_metric_history
+        """
+        with history_lock:
+            return sorted(history.get(env_name, {}))
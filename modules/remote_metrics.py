@@ -1,20 +1,180 @@
-import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 import paramiko
+from config_registry import config_registry
+from backend_executor import run_blocking
 
+TOOL_BACKEND = "ssh"  # label for tool metrics
 CONFIG_FILE = Path(__file__).parent / "env_config.json"
 
 def load_env_config() -> Dict[str, Any]:
-    """Loads the configuration file, creates an empty dict if it does not exist."""
-    if not CONFIG_FILE.exists():
-        CONFIG_FILE.write_text("{}", encoding="utf-8")
-        return {}
-    with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Returns the cached configuration file, creates an empty dict if it does not exist."""
+    return config_registry.get(str(CONFIG_FILE), default={}, validator=lambda c: isinstance(c, dict))
+
+# ---------------- SSH Pool ----------------
+
+SSH_CONNECT_TIMEOUT = int(os.getenv("SSH_CONNECT_TIMEOUT", "10"))
+SSH_KEEPALIVE_INTERVAL = int(os.getenv("SSH_KEEPALIVE_INTERVAL", "30"))
+SSH_IDLE_TIMEOUT = int(os.getenv("SSH_IDLE_TIMEOUT", "300"))
+SSH_MAX_CHANNELS_PER_HOST = int(os.getenv("SSH_MAX_CHANNELS_PER_HOST", "4"))
+
+
+class _PooledConnection:
+    """A long-lived SSH transport to a single host plus a cap on concurrent channels."""
+
+    def __init__(self, host: str, port: int, username: str, password: str, max_channels: int):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.client: Optional[paramiko.SSHClient] = None
+        self.channels = threading.BoundedSemaphore(max_channels)
+        self.lock = threading.Lock()
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+    def is_active(self) -> bool:
+        transport = self.client.get_transport() if self.client else None
+        return bool(transport and transport.is_active())
+
+    def connect(self) -> paramiko.SSHClient:
+        """Returns a connected client, reconnecting if the transport has dropped."""
+        with self.lock:
+            if not self.is_active():
+                self.close()
+                client = paramiko.SSHClient()
+                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                client.connect(
+                    hostname=self.host,
+                    port=self.port,
+                    username=self.username,
+                    password=self.password,
+                    timeout=SSH_CONNECT_TIMEOUT,
+                    allow_agent=False,
+                    look_for_keys=False,
+                )
+                client.get_transport().set_keepalive(SSH_KEEPALIVE_INTERVAL)
+                self.client = client
+            return self.client
+
+    def close(self):
+        if self.client:
+            try:
+                self.client.close()
+            except Exception:
+                pass
+            self.client = None
+
+
+class SSHConnectionPool:
+    """Keeps one transport per remote host and opens a new channel per command."""
+
+    def __init__(self, idle_timeout: int = SSH_IDLE_TIMEOUT, max_channels: int = SSH_MAX_CHANNELS_PER_HOST):
+        self.idle_timeout = idle_timeout
+        self.max_channels = max_channels
+        self._connections: Dict[tuple, _PooledConnection] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+
+    def _get_connection(self, connection_info: dict) -> _PooledConnection:
+        host = connection_info["host"]
+        port = int(connection_info.get("port", 22))
+        username = connection_info["username"]
+        password = connection_info["password"]
+        key = (host, port, username, password)
+        with self._lock:
+            conn = self._connections.get(key)
+            if conn is None:
+                max_channels = int(connection_info.get("max_channels", self.max_channels))
+                conn = _PooledConnection(host, port, username, password, max_channels)
+                self._connections[key] = conn
+            conn.in_use += 1
+            self._start_reaper()
+        return conn
+
+    def _release(self, conn: _PooledConnection):
+        with self._lock:
+            conn.in_use -= 1
+            conn.last_used = time.monotonic()
+
+    def exec_command(self, connection_info: dict, command: str) -> Tuple[str, str]:
+        """Runs a command on a pooled transport and returns (stdout, stderr)."""
+        conn = self._get_connection(connection_info)
+        try:
+            with conn.channels:
+                for attempt in range(2):
+                    client = conn.connect()
+                    try:
+                        stdin, stdout, stderr = client.exec_command(command, timeout=SSH_CONNECT_TIMEOUT * 6)
+                    except (paramiko.SSHException, EOFError, OSError):
+                        # Couldn't open a channel: stale transport (server restart, network blip), reconnect once
+                        self._drop_client(conn, client)
+                        if attempt:
+                            raise
+                        continue
+                    try:
+                        return stdout.read().decode().strip(), stderr.read().decode().strip()
+                    except TimeoutError:
+                        # A slow command: only this channel goes, the shared transport stays up for other commands
+                        stdout.channel.close()
+                        raise
+                    except (paramiko.SSHException, EOFError, OSError):
+                        stdout.channel.close()
+                        transport = client.get_transport()
+                        if attempt or (transport and transport.is_active()):
+                            raise
+                        # The transport died mid-command: reconnect and run it once more
+                        self._drop_client(conn, client)
+        finally:
+            self._release(conn)
+
+    @staticmethod
+    def _drop_client(conn: _PooledConnection, client: paramiko.SSHClient):
+        # Another thread may already have reconnected; don't close its fresh transport
+        with conn.lock:
+            if conn.client is client:
+                conn.close()
+
+    def evict_idle(self):
+        """Closes transports that have not been used within the idle timeout."""
+        now = time.monotonic()
+        with self._lock:
+            for key, conn in list(self._connections.items()):
+                if conn.in_use == 0 and now - conn.last_used > self.idle_timeout:
+                    with conn.lock:
+                        conn.close()
+                    del self._connections[key]
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._connections.values():
+                with conn.lock:
+                    conn.close()
+            self._connections.clear()
+
+    def _start_reaper(self):
+        if self._reaper and self._reaper.is_alive():
+            return
+
+        def reap():
+            while True:
+                time.sleep(max(self.idle_timeout / 2, 1))
+                self.evict_idle()
+
+        self._reaper = threading.Thread(target=reap, name="ssh-pool-reaper", daemon=True)
+        self._reaper.start()
+
+
+ssh_pool = SSHConnectionPool()
+
 
 def run_ssh_command(connection_info: dict, command: str, working_dir: str = "") -> str:
-    """Runs a command on a remote host via SSH and returns the output."""
+    """Runs a command on a remote host over a pooled SSH transport and returns the output."""
     username = connection_info.get("username")
     password = connection_info.get("password")
     host = connection_info.get("host")
@@ -22,20 +182,11 @@ def run_ssh_command(connection_info: dict, command: str, working_dir: str = "")
     if not all([username, password, host, command]):
         raise ValueError("Missing required connection information.")
 
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
     if working_dir:
         command = f"cd {working_dir} && {command}"
 
     try:
-        ssh.connect(hostname=host, username=username, password=password, timeout=10)
-        stdin, stdout, stderr = ssh.exec_command(command)
-
-        output = stdout.read().decode().strip()
-        error = stderr.read().decode().strip()
-
-        ssh.close()
+        output, error = ssh_pool.exec_command(connection_info, command)
 
         if error:
             return f"Error: {error}"
@@ -44,57 +195,535 @@ def run_ssh_command(connection_info: dict, command: str, working_dir: str = "")
     except Exception as e:
         return f"SSH connection failed: {str(e)}"
 
+METRIC_COMMANDS = {
+    "disk_usage": "df -h",
+    "cpu_load": "uptime",
+    "memory_usage": "free -h",
+    "wifi_status": "iwconfig",
+    "processes": "ps aux --sort=-%cpu | head -n 10",
+    "network": "ip -s link",
+    "temperature": "sensors",
+    "uptime": "uptime -p",
+    "docker_containers": "docker ps -a",
+    "disk_inode": "df -i",
+    "network_speed": "cat /sys/class/net/eth0/speed"
+}
+
 def run_metric_ssh(env_data: dict, metric: str) -> str:
     """Runs a single metric command via SSH on the remote host."""
-    metric_commands = {
-        "disk_usage": "df -h",  
-        "cpu_load": "uptime", 
-        "memory_usage": "free -h", 
-        "wifi_status": "iwconfig", 
-        "processes": "ps aux --sort=-%cpu | head -n 10",
-        "network": "ip -s link",
-        "temperature": "sensors", 
-        "uptime": "uptime -p", 
-        "docker_containers": "docker ps -a",  
-        "disk_inode": "df -i",  
-        "network_speed": "cat /sys/class/net/eth0/speed"
+    if metric not in METRIC_COMMANDS:
+        return f"❌ Unknown metric '{metric}'"
+
+    return run_ssh_command(env_data, METRIC_COMMANDS[metric])
+
+# ---------------- Batched Metrics ----------------
+
+def build_metrics_script(metrics: List[str], marker: str, commands: Dict[str, str] = METRIC_COMMANDS) -> str:
+    """
+    Joins metric commands into one shell script with per-section delimiters and exit codes.
+
+    Every delimiter is preceded by a newline, so it starts its own line even when the
+    section's output doesn't end with one; parse_metrics_output drops that newline again.
+    """
+    lines = ['__mcp_err=$(mktemp)']
+    for m in metrics:
+        lines += [
+            f"printf '\\n%s\\n' '{marker}:{m}:BEGIN'",
+            f'( {commands[m]} ) 2>"$__mcp_err" </dev/null; __mcp_rc=$?',
+            f"printf '\\n%s\\n' '{marker}:{m}:STDERR'",
+            'cat "$__mcp_err"',
+            f"printf '\\n%s\\n' \"{marker}:{m}:END:$__mcp_rc\"",
+        ]
+    lines.append('rm -f "$__mcp_err"')
+    return "\n".join(lines)
+
+def parse_metrics_output(output: str, metrics: List[str], marker: str) -> Dict[str, str]:
+    """Splits batched script output back into metric name -> output, like run_metric_ssh."""
+    sections: Dict[str, Dict[str, list]] = {}
+    current, stream = None, None
+    for line in output.splitlines():
+        if line.startswith(f"{marker}:"):
+            # The newline printed before each delimiter leaves an empty line unless the output lacked one
+            if current and sections[current][stream] and not sections[current][stream][-1]:
+                sections[current][stream].pop()
+            _, name, tag = line.split(":", 2)
+            if tag == "BEGIN":
+                current, stream = name, "out"
+                sections[name] = {"out": [], "err": [], "rc": None}
+            elif tag == "STDERR":
+                stream = "err"
+            else:
+                # END:<exit code>
+                rc = tag.partition(":")[2]
+                if name in sections and rc.lstrip("-").isdigit():
+                    sections[name]["rc"] = int(rc)
+                current, stream = None, None
+            continue
+        if current:
+            sections[current][stream].append(line)
+
+    results = {}
+    for m in metrics:
+        if m not in sections:
+            results[m] = f"❌ No output received for metric '{m}'"
+            continue
+        out = "\n".join(sections[m]["out"]).strip()
+        err = "\n".join(sections[m]["err"]).strip()
+        rc = sections[m]["rc"]
+        if err:
+            results[m] = f"Error: {err}"
+        elif rc:
+            results[m] = f"Error: exit code {rc}"
+        else:
+            results[m] = out
+    return results
+
+def run_metrics_batch(env_data: dict, metrics: List[str], commands: Dict[str, str] = METRIC_COMMANDS) -> Dict[str, str]:
+    """Runs several metric commands in a single remote exec and returns metric name -> output."""
+    unknown = [m for m in metrics if m not in commands]
+    known = [m for m in metrics if m in commands]
+    results = {m: f"❌ Unknown metric '{m}'" for m in unknown}
+    if not known:
+        return results
+
+    if not all([env_data.get("username"), env_data.get("password"), env_data.get("host")]):
+        raise ValueError("Missing required connection information.")
+
+    marker = f"__MCP_{uuid.uuid4().hex}"
+    try:
+        output, _ = ssh_pool.exec_command(env_data, build_metrics_script(known, marker, commands))
+    except Exception as e:
+        results.update({m: f"SSH connection failed: {str(e)}" for m in known})
+        return results
+
+    results.update(parse_metrics_output(output, known, marker))
+    return results
+
+# ---------------- Structured Metrics ----------------
+
+# Machine-readable variants of METRIC_COMMANDS: byte counts and /proc reads instead of human units
+STRUCTURED_COMMANDS = {
+    "disk_usage": "df -P -B1",
+    "cpu_load": "cat /proc/loadavg",
+    "memory_usage": "cat /proc/meminfo",
+    "wifi_status": "cat /proc/net/wireless",
+    "processes": "ps -eo pid,pcpu,pmem,rss,comm --sort=-pcpu --no-headers | head -n 10",
+    "network": "cat /proc/net/dev",
+    "temperature": 'for z in /sys/class/thermal/thermal_zone*; do if [ -r "$z/temp" ]; then echo "$(cat $z/type) $(cat $z/temp)"; fi; done',
+    "uptime": "cat /proc/uptime",
+    "docker_containers": "docker ps -a --format '{{.Names}}\t{{.Image}}\t{{.State}}\t{{.Status}}'",
+    "disk_inode": "df -P -i",
+    "network_speed": "cat /sys/class/net/eth0/speed"
+}
+
+def _parse_df(output: str, unit: str) -> List[Dict[str, Any]]:
+    mounts = []
+    for line in output.splitlines()[1:]:
+        parts = line.split()
+        if len(parts) < 6 or not parts[1].isdigit():
+            continue
+        mounts.append({
+            "filesystem": parts[0],
+            "mount": " ".join(parts[5:]),
+            f"total_{unit}": int(parts[1]),
+            f"used_{unit}": int(parts[2]),
+            f"free_{unit}": int(parts[3]),
+        })
+    return mounts
+
+def parse_disk_usage(output: str) -> List[Dict[str, Any]]:
+    return _parse_df(output, "bytes")
+
+def parse_disk_inode(output: str) -> List[Dict[str, Any]]:
+    return _parse_df(output, "inodes")
+
+def parse_cpu_load(output: str) -> Dict[str, Any]:
+    load1, load5, load15, procs = output.split()[:4]
+    running, total = procs.split("/")
+    return {"load_1": float(load1), "load_5": float(load5), "load_15": float(load15),
+            "running_procs": int(running), "total_procs": int(total)}
+
+def parse_memory_usage(output: str) -> Dict[str, int]:
+    info = {}
+    for line in output.splitlines():
+        key, _, value = line.partition(":")
+        parts = value.split()
+        if parts and parts[0].isdigit():
+            info[key] = int(parts[0]) * (1024 if len(parts) > 1 and parts[1] == "kB" else 1)
+    total = info.get("MemTotal", 0)
+    available = info.get("MemAvailable", info.get("MemFree", 0))
+    return {
+        "total_bytes": total,
+        "available_bytes": available,
+        "used_bytes": total - available,
+        "swap_total_bytes": info.get("SwapTotal", 0),
+        "swap_used_bytes": info.get("SwapTotal", 0) - info.get("SwapFree", 0),
     }
 
-    if metric not in metric_commands:
-        return f"❌ Unknown metric '{metric}'"
+def parse_network(output: str) -> Dict[str, Dict[str, int]]:
+    interfaces = {}
+    for line in output.splitlines()[2:]:
+        name, _, counters = line.partition(":")
+        fields = counters.split()
+        if len(fields) < 16:
+            continue
+        values = [int(v) for v in fields]
+        interfaces[name.strip()] = {
+            "rx_bytes": values[0], "rx_packets": values[1], "rx_errors": values[2], "rx_dropped": values[3],
+            "tx_bytes": values[8], "tx_packets": values[9], "tx_errors": values[10], "tx_dropped": values[11],
+        }
+    return interfaces
+
+def parse_wifi_status(output: str) -> Dict[str, Dict[str, float]]:
+    interfaces = {}
+    for line in output.splitlines()[2:]:
+        name, _, rest = line.partition(":")
+        fields = rest.split()
+        if len(fields) < 4:
+            continue
+        interfaces[name.strip()] = {
+            "link_quality": float(fields[1].rstrip(".")),
+            "signal_dbm": float(fields[2].rstrip(".")),
+            "noise_dbm": float(fields[3].rstrip(".")),
+        }
+    return interfaces
+
+def parse_processes(output: str) -> List[Dict[str, Any]]:
+    processes = []
+    for line in output.splitlines():
+        parts = line.split(None, 4)
+        if len(parts) < 5:
+            continue
+        processes.append({"pid": int(parts[0]), "cpu_percent": float(parts[1]), "mem_percent": float(parts[2]),
+                          "rss_bytes": int(parts[3]) * 1024, "command": parts[4]})
+    return processes
 
-    return run_ssh_command(env_data, metric_commands[metric])
+def parse_temperature(output: str) -> Dict[str, float]:
+    sensors = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[1].lstrip("-").isdigit():
+            name = parts[0]
+            if name in sensors:
+                name = f"{name}_{len(sensors)}"
+            sensors[name] = int(parts[1]) / 1000
+    return sensors
+
+def parse_uptime(output: str) -> Dict[str, float]:
+    return {"uptime_seconds": float(output.split()[0])}
+
+def parse_docker_containers(output: str) -> List[Dict[str, str]]:
+    containers = []
+    for line in output.splitlines():
+        parts = line.split("\t")
+        if len(parts) == 4:
+            containers.append({"name": parts[0], "image": parts[1], "state": parts[2], "status": parts[3]})
+    return containers
+
+def parse_network_speed(output: str) -> Dict[str, int]:
+    return {"speed_mbps": int(output.strip())}
+
+STRUCTURED_PARSERS = {
+    "disk_usage": parse_disk_usage,
+    "cpu_load": parse_cpu_load,
+    "memory_usage": parse_memory_usage,
+    "wifi_status": parse_wifi_status,
+    "processes": parse_processes,
+    "network": parse_network,
+    "temperature": parse_temperature,
+    "uptime": parse_uptime,
+    "docker_containers": parse_docker_containers,
+    "disk_inode": parse_disk_inode,
+    "network_speed": parse_network_speed,
+}
+
+def run_metrics_structured(env_data: dict, metrics: List[str]) -> Dict[str, Any]:
+    """Runs machine-readable metric variants in one remote exec and returns typed records per metric."""
+    raw = run_metrics_batch(env_data, metrics, STRUCTURED_COMMANDS)
+    results = {}
+    for m, output in raw.items():
+        if m not in STRUCTURED_PARSERS or output.startswith(("Error:", "❌", "SSH connection failed")):
+            results[m] = {"error": output}
+            continue
+        try:
+            results[m] = STRUCTURED_PARSERS[m](output)
+        except (ValueError, IndexError) as e:
+            results[m] = {"error": f"Could not parse output: {e}"}
+    return results
+
+# ---------------- Rate Metrics ----------------
+
+# Cumulative kernel counters read in one remote exec; rates come from deltas between two reads
+RATE_COMMANDS = {
+    "clock": "cat /proc/uptime",
+    "cpu": "head -n 1 /proc/stat",
+    "network": "cat /proc/net/dev",
+    "disk": "cat /proc/diskstats",
+}
+# Rate sections are only collected when the matching metric is allowed for the environment
+RATE_SOURCES = {"cpu": "cpu_load", "network": "network", "disk": "disk_usage"}
+RATE_BOOTSTRAP_INTERVAL = 1.0
+DISK_SECTOR_BYTES = 512
+
+rate_snapshots: Dict[tuple, Dict[str, Any]] = {}
+rate_lock = threading.Lock()
+
+def parse_proc_stat_cpu(output: str) -> Dict[str, int]:
+    values = [int(v) for v in output.split()[1:]]
+    idle = values[3] + (values[4] if len(values) > 4 else 0)
+    # guest/guest_nice (fields 9-10) are already included in user/nice
+    return {"total": sum(values[:8]), "idle": idle, "iowait": values[4] if len(values) > 4 else 0}
+
+def parse_diskstats(output: str) -> Dict[str, Dict[str, int]]:
+    disks = {}
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) < 14 or fields[2].startswith(("loop", "ram")):
+            continue
+        disks[fields[2]] = {
+            "reads": int(fields[3]),
+            "read_bytes": int(fields[5]) * DISK_SECTOR_BYTES,
+            "writes": int(fields[7]),
+            "write_bytes": int(fields[9]) * DISK_SECTOR_BYTES,
+        }
+    return disks
+
+def take_rate_snapshot(env_data: dict, sections: List[str]) -> Dict[str, Any]:
+    """Reads /proc/uptime plus the requested counter files in a single remote exec."""
+    raw = run_metrics_batch(env_data, ["clock"] + sections, RATE_COMMANDS)
+    for name, output in raw.items():
+        if output.startswith(("Error:", "❌", "SSH connection failed")):
+            raise RuntimeError(output)
+    snapshot: Dict[str, Any] = {"clock": float(raw["clock"].split()[0])}
+    if "cpu" in raw:
+        snapshot["cpu"] = parse_proc_stat_cpu(raw["cpu"])
+    if "network" in raw:
+        snapshot["network"] = parse_network(raw["network"])
+    if "disk" in raw:
+        snapshot["disk"] = parse_diskstats(raw["disk"])
+    return snapshot
+
+def _per_second(current: Dict[str, Dict[str, int]], previous: Dict[str, Dict[str, int]], fields: Dict[str, str],
+                elapsed: float) -> Dict[str, Dict[str, float]]:
+    rates = {}
+    for name, counters in current.items():
+        if name not in previous:
+            continue
+        rates[name] = {
+            out: round(max(counters[src] - previous[name][src], 0) / elapsed, 2) for out, src in fields.items()
+        }
+    return rates
+
+def compute_rates(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    elapsed = current["clock"] - previous["clock"]
+    rates: Dict[str, Any] = {"interval_seconds": round(elapsed, 3)}
+    if "cpu" in current and "cpu" in previous:
+        total = current["cpu"]["total"] - previous["cpu"]["total"]
+        idle = current["cpu"]["idle"] - previous["cpu"]["idle"]
+        iowait = current["cpu"]["iowait"] - previous["cpu"]["iowait"]
+        rates["cpu"] = {
+            "cpu_percent": round(100 * (total - idle) / total, 2) if total > 0 else 0.0,
+            "iowait_percent": round(100 * iowait / total, 2) if total > 0 else 0.0,
+        }
+    if "network" in current and "network" in previous:
+        rates["network"] = _per_second(current["network"], previous["network"], {
+            "rx_bytes_per_s": "rx_bytes", "tx_bytes_per_s": "tx_bytes",
+            "rx_packets_per_s": "rx_packets", "tx_packets_per_s": "tx_packets",
+        }, elapsed)
+    if "disk" in current and "disk" in previous:
+        rates["disk"] = _per_second(current["disk"], previous["disk"], {
+            "read_iops": "reads", "write_iops": "writes",
+            "read_bytes_per_s": "read_bytes", "write_bytes_per_s": "write_bytes",
+        }, elapsed)
+    return rates
+
+def get_rates(env_data: dict) -> Dict[str, Any]:
+    """Returns per-second CPU, network and disk rates since the previous call for this host."""
+    allowed_metrics = env_data.get("metrics", [])
+    sections = [section for section, metric in RATE_SOURCES.items() if metric in allowed_metrics]
+    if not sections:
+        return {"error": "None of cpu_load, network or disk_usage is allowed for this environment"}
+
+    key = (env_data.get("host"), int(env_data.get("port", 22)))
+    current = take_rate_snapshot(env_data, sections)
+    with rate_lock:
+        previous = rate_snapshots.get(key)
+        rate_snapshots[key] = current
+
+    # No usable baseline yet, or the host rebooted and counters reset: take a short second sample
+    if not previous or previous["clock"] >= current["clock"] or set(sections) - set(previous):
+        time.sleep(RATE_BOOTSTRAP_INTERVAL)
+        previous, current = current, take_rate_snapshot(env_data, sections)
+        with rate_lock:
+            rate_snapshots[key] = current
+
+    return compute_rates(previous, current)
+
+# ---------------- Fleet Fan-out ----------------
+
+FLEET_MAX_WORKERS = int(os.getenv("FLEET_MAX_WORKERS", "8"))
+FLEET_HOST_TIMEOUT = float(os.getenv("FLEET_HOST_TIMEOUT", "15"))
+
+def _collect_env_metrics(env_data: dict, metric: str, partial: Dict[str, str], started: Dict[str, float], env_name: str):
+    """Runs the allowed metrics for one environment in a single remote exec, recording the results in partial."""
+    started[env_name] = time.monotonic()
+    allowed_metrics = env_data.get("metrics", [])
+    runnable = []
+    for m in ([metric] if metric else allowed_metrics):
+        if m not in allowed_metrics:
+            partial[m] = f"❌ Metric '{m}' is not allowed for this environment"
+        else:
+            runnable.append(m)
+    if len(runnable) > 1:
+        partial.update(run_metrics_batch(env_data, runnable))
+    elif runnable:
+        partial[runnable[0]] = run_metric_ssh(env_data, runnable[0])
+
+def get_fleet_metrics(env_names: List[str], metric: str = "", max_workers: int = FLEET_MAX_WORKERS,
+                      host_timeout: float = FLEET_HOST_TIMEOUT) -> Dict[str, Any]:
+    """
+    Queries many environments concurrently; slow hosts return partial results with a timeout marker.
+
+    Every host's deadline runs from when the batch is submitted, not from when it gets a
+    worker, so hung hosts holding the pool can't delay the rest past host_timeout. Hosts
+    still queued at their deadline are cancelled and reported as timeouts.
+    """
+    config = load_env_config()
+    results: Dict[str, Any] = {}
+    partials: Dict[str, Dict[str, str]] = {}
+    started: Dict[str, float] = {}
+    futures = {}
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="fleet-metrics")
+    submitted = time.monotonic()
+    try:
+        for env_name in env_names:
+            if env_name not in config:
+                results[env_name] = {"status": "error", "error": f"Environment '{env_name}' not found"}
+                continue
+            if not config[env_name].get("metrics"):
+                results[env_name] = {"status": "error", "error": f"No metrics defined for environment '{env_name}'"}
+                continue
+            partials[env_name] = {}
+            future = executor.submit(_collect_env_metrics, config[env_name], metric, partials[env_name], started, env_name)
+            futures[future] = env_name
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            elapsed = round(now - submitted, 3)
+            for future in done:
+                env_name = futures[future]
+                if future.exception():
+                    results[env_name] = {"status": "error", "elapsed": elapsed, "error": str(future.exception()),
+                                         "metrics": dict(partials[env_name])}
+                else:
+                    results[env_name] = {"status": "ok", "elapsed": elapsed, "metrics": dict(partials[env_name])}
+            if now - submitted <= host_timeout:
+                continue
+            for future in [f for f in futures if f in pending]:
+                env_name = futures[future]
+                # A running worker is left to finish in the background; a queued one never starts
+                if future.cancel() or env_name not in started:
+                    error = f"⏱ Timed out after {host_timeout}s waiting for a free worker"
+                else:
+                    error = f"⏱ Timed out after {host_timeout}s"
+                results[env_name] = {"status": "timeout", "elapsed": elapsed, "error": error,
+                                     "metrics": dict(partials[env_name])}
+            pending = set()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return {"completed_order": list(results), "results": results}
+
+def get_env_metrics(env_name: str, metric: str = "", batch: bool = True, structured: bool = False) -> Dict[str, Any]:
+    """Runs the requested (or all allowed) metrics for one environment."""
+    config = load_env_config()
+    if env_name not in config:
+        return {"error": f"Environment '{env_name}' not found"}
+
+    env_data = config[env_name]
+    allowed_metrics = env_data.get("metrics", [])
+    if not allowed_metrics:
+        return {"error": f"No metrics defined for environment '{env_name}'"}
+
+    requested_metrics = [metric] if metric else allowed_metrics
+
+    results = {}
+    runnable = []
+    for m in requested_metrics:
+        if m not in allowed_metrics:
+            results[m] = f"❌ Metric '{m}' is not allowed for this environment"
+        else:
+            runnable.append(m)
+
+    if structured and runnable:
+        results.update(run_metrics_structured(env_data, runnable))
+    elif batch and len(runnable) > 1:
+        results.update(run_metrics_batch(env_data, runnable))
+    else:
+        for m in runnable:
+            results[m] = run_metric_ssh(env_data, m)
+
+    return {m: results[m] for m in requested_metrics}
 
 def register_tools(mcp):
     @mcp.tool()
-    def get_remote_metrics(env_name: str, metric: str = "") -> Dict[str, str]:
+    async def get_remote_metrics(env_name: str, metric: str = "", batch: bool = True, structured: bool = False) -> Dict[str, Any]:
         """
         Returns predefined metrics from a remote host.
 
         Args:
             env_name (str): environment name from config
             metric (str): single metric to fetch; fetches all allowed if empty
+            batch (bool): run all requested metrics in one remote exec instead of one per metric
+            structured (bool): return typed records (bytes, floats, counters) instead of raw command text
 
         Returns:
-            Dict[str, str]: metric name -> output
+            Dict[str, Any]: metric name -> output (str), or parsed record when structured
         """
-        config = load_env_config()
-        if env_name not in config:
-            return {"error": f"Environment '{env_name}' not found"}
+        return await run_blocking("ssh", get_env_metrics, env_name, metric, batch, structured)
 
-        env_data = config[env_name]
-        allowed_metrics = env_data.get("metrics", [])
-        if not allowed_metrics:
-            return {"error": f"No metrics defined for environment '{env_name}'"}
+    @mcp.tool()
+    async def get_remote_metrics_bulk(env_names: List[str], metric: str = "", max_workers: int = FLEET_MAX_WORKERS,
+                                      host_timeout: float = FLEET_HOST_TIMEOUT) -> Dict[str, Any]:
+        """
+        Returns predefined metrics from many remote hosts concurrently.
 
-        requested_metrics = [metric] if metric else allowed_metrics
+        Args:
+            env_names (List[str]): environment names from config, or ["all"] for every environment
+            metric (str): single metric to fetch; fetches all allowed if empty
+            max_workers (int): maximum number of hosts queried at the same time
+            host_timeout (float): seconds from the start of the call before a host's partial results are returned
 
-        results = {}
-        for m in requested_metrics:
-            if m not in allowed_metrics:
-                results[m] = f"❌ Metric '{m}' is not allowed for this environment"
-            else:
-                results[m] = run_metric_ssh(env_data, m)
+        Returns:
+            Dict[str, Any]: 'results' per environment (status ok/timeout/error, elapsed, metrics)
+                            in completion order, and 'completed_order'
+        """
+        if env_names == ["all"] or env_names == "all":
+            env_names = list(load_env_config())
+        return await run_blocking("ssh", get_fleet_metrics, env_names, metric, max_workers, host_timeout)
 
-        return results
+    @mcp.tool()
+    async def get_remote_rates(env_name: str) -> Dict[str, Any]:
+        """
+        Returns per-second rates computed from /proc counter deltas on a remote host.
 
+        Rates are measured since the previous call for the same host (or over a short
+        1s window on the first call): CPU % and iowait %, bytes/s and packets/s per
+        network interface, and IOPS and bytes/s per disk.
+
+        Args:
+            env_name (str): environment name from config
+
+        Returns:
+            Dict[str, Any]: interval_seconds, cpu, network and disk rates
+        """
+        config = load_env_config()
+        if env_name not in config:
+            return {"error": f"Environment '{env_name}' not found"}
+        try:
+            return await run_blocking("ssh", get_rates, config[env_name])
+        except Exception as e:
+            return {"error": str(e)}
@@ -1,25 +1,152 @@
 import os
 import json
-from datetime import datetime
-import requests
+import heapq
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.base import BaseTrigger
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from dotenv import load_dotenv
+from http_client import get_session
+from histogram import Histogram
+from tool_metrics import histogram_lines, tool_metrics
 
 load_dotenv()
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-TASKS_FILE = os.path.join(BASE_DIR, 'tasks.json')
+TASKS_FILE = os.path.join(BASE_DIR, 'tasks.json')  # legacy store, imported into the DB once
+TASKS_DB = os.getenv('TASKS_DB', os.path.join(BASE_DIR, 'tasks.db'))
 TRIGGER_WEBHOOK_URL = os.getenv('TRIGGER_WEBHOOK_URL')
 DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+WEBHOOK_SENDERS = int(os.getenv("WEBHOOK_SENDERS", "4"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "6"))
+WEBHOOK_RETRY_BASE = float(os.getenv("WEBHOOK_RETRY_BASE", "5"))
+WEBHOOK_RETRY_MAX = float(os.getenv("WEBHOOK_RETRY_MAX", "600"))
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "10"))
+MISFIRE_GRACE_TIME = 300  # 5 דקות
+TASK_METRICS_MAX = 5000
+# "spread" places tasks sharing a schedule within this many seconds (or the schedule's period, if shorter)
+TASK_SPREAD_WINDOW = int(os.getenv("TASK_SPREAD_WINDOW", "300"))
+INTERVAL_FIELDS = ("days", "hours", "minutes", "seconds")
+# Upcoming cron fire times checked for the shortest gap; covers irregular schedules like weekdays-only or 1st/15th
+CRON_PERIOD_SAMPLES = 64
 
 # ---------------- Scheduler ----------------
 
+def job_id(task_id):
+    return f"task-{task_id}"
+
+class OffsetJitterTrigger(BaseTrigger):
+    """
+    Wraps a cron/interval trigger, firing `offset` seconds after each of its times plus up to `jitter` random seconds.
+
+    Unlike APScheduler's own interval jitter, the next time is always taken from the
+    wrapped trigger's un-jittered grid, so jitter never accumulates into drift.
+    """
+
+    def __init__(self, trigger, offset=0, jitter=0):
+        self.trigger = trigger
+        self.offset = timedelta(seconds=offset)
+        self.jitter = jitter
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        # The next grid time after the last (shifted, jittered) run; jitter is validated to stay below the period
+        start = (previous_fire_time + timedelta(microseconds=1)) if previous_fire_time else now
+        next_time = self.trigger.get_next_fire_time(None, start - self.offset)
+        if next_time is None:
+            return None
+        return next_time + self.offset + timedelta(seconds=random.uniform(0, self.jitter))
+
+    def __str__(self):
+        return f"{self.trigger} +{self.offset.total_seconds():g}s ~{self.jitter:g}s"
+
+def base_trigger(task):
+    """The task's cron/interval trigger, without offset or jitter."""
+    if task["type"] == "cron":
+        return CronTrigger.from_crontab(task["cron"])
+    start = datetime.fromisoformat(task["start"])
+    return IntervalTrigger(**{f: task.get(f, 0) for f in INTERVAL_FIELDS}, start_date=start)
+
+def trigger_period(trigger) -> float:
+    """Shortest number of seconds between consecutive fire times (for cron, over the next CRON_PERIOD_SAMPLES)."""
+    if isinstance(trigger, IntervalTrigger):
+        return trigger.interval_length
+    gaps = []
+    previous = trigger.get_next_fire_time(None, datetime.now(timezone.utc))
+    for _ in range(CRON_PERIOD_SAMPLES):
+        current = trigger.get_next_fire_time(None, previous + timedelta(microseconds=1))
+        if current is None:
+            break
+        gaps.append((current - previous).total_seconds())
+        previous = current
+    return min(gaps)
+
+def schedule_key(task):
+    if task["type"] == "cron":
+        return "cron", task["cron"]
+    return ("interval",) + tuple(task.get(f, 0) for f in INTERVAL_FIELDS)
+
+def schedule_phase(task, period):
+    """Where in its period a task fires: interval tasks are anchored at their start time, cron tasks at the epoch."""
+    anchor = datetime.fromisoformat(task["start"]).timestamp() if task["type"] == "interval" else 0
+    return (anchor + task.get("offset", 0)) % period
+
+def spread_offset(task, period, offset=0):
+    """
+    Picks an extra offset for a new task in the middle of the largest gap left by tasks with the same schedule.
+
+    Tasks are compared by phase (start + offset, modulo the period), so two interval tasks
+    created at different times never land on the same second. Only the part of each gap
+    within TASK_SPREAD_WINDOW after the new task's own phase counts; offsets are kept in
+    the task itself, so placement is stable across restarts and the first task of a
+    schedule isn't shifted.
+    """
+    window = int(min(period, TASK_SPREAD_WINDOW))
+    key = schedule_key(task)
+    base = schedule_phase({**task, "offset": offset}, period)
+    # Other tasks' phases relative to the new task's, plus their neighbours one period away
+    taken = sorted((schedule_phase(t, period) - base) % period for t in load_tasks()
+                   if t["type"] in ("cron", "interval") and schedule_key(t) == key)
+    if not taken:
+        return 0
+    points = [taken[-1] - period, *taken, taken[0] + period]
+    gaps = [(max(a, 0), min(b, window)) for a, b in zip(points, points[1:])]
+    start, end = max(gaps, key=lambda gap: gap[1] - gap[0])
+    return int((start + end) / 2) % window
+
+def prepare_recurring_task(task, jitter, offset, spread):
+    """Validates the schedule and fills in offset/jitter; returns an error message or None."""
+    try:
+        period = trigger_period(base_trigger(task))
+    except Exception:
+        return "❌ Invalid schedule."
+    if jitter < 0 or offset < 0:
+        return "❌ jitter and offset must not be negative."
+    if jitter >= period:
+        return f"❌ jitter must be shorter than the schedule's period ({period:g}s)."
+    if spread:
+        offset += spread_offset(task, period, offset)
+    if offset:
+        task["offset"] = offset
+    if jitter:
+        task["jitter"] = jitter
+    return None
+
 def schedule_task(task):
-    """Schedule a task using APScheduler (date or cron) with misfire handling and automatic removal for 'once' tasks."""
+    """Schedule a task using APScheduler (date, cron or interval) with misfire handling and automatic removal for 'once' tasks."""
     task_type = task.get("type", "once")
     prompt = task["prompt"]
+    task_id = task["id"]
 
     if task_type == "once":
         run_time = datetime.strptime(task["time"], DATE_FORMAT)
@@ -27,52 +154,353 @@ def schedule_task(task):
 
         def job_wrapper():
             try:
-                send_webhook_trigger(prompt)
+                dispatcher.enqueue(prompt, task_id)
             finally:
-                tasks = load_tasks()
-                tasks = [t for t in tasks if not (t.get("type") == "once" and t.get("prompt") == prompt and t.get("time") == task["time"])]
-                save_tasks(tasks)
-
-        scheduler.add_job(job_wrapper, trigger, misfire_grace_time=300)  # 5 דקות
-    elif task_type == "cron":
-        cron_expr = task["cron"]
-        trigger = CronTrigger.from_crontab(cron_expr)
-        scheduler.add_job(lambda: send_webhook_trigger(prompt), trigger, misfire_grace_time=300)
-
-# ---------------- File Handling ----------------
+                task_store.delete(task_id)
+
+        scheduler.add_job(job_wrapper, trigger, id=job_id(task_id), replace_existing=True, misfire_grace_time=MISFIRE_GRACE_TIME)
+    elif task_type in ("cron", "interval"):
+        trigger = base_trigger(task)
+        if task.get("offset") or task.get("jitter"):
+            trigger = OffsetJitterTrigger(trigger, task.get("offset", 0), task.get("jitter", 0))
+        scheduler.add_job(lambda: dispatcher.enqueue(prompt, task_id), trigger, id=job_id(task_id), replace_existing=True,
+                          misfire_grace_time=MISFIRE_GRACE_TIME)
+
+def format_offset_jitter(task):
+    parts = []
+    if task.get("offset"):
+        parts.append(f"offset {task['offset']}s")
+    if task.get("jitter"):
+        parts.append(f"jitter {task['jitter']}s")
+    return f", {', '.join(parts)}" if parts else ""
+
+def unschedule_task(task_id):
+    try:
+        scheduler.remove_job(job_id(task_id))
+    except JobLookupError:
+        pass  # one-shot task that already ran, or never scheduled
+
+# ---------------- Task Store ----------------
+
+class TaskStore:
+    """
+    SQLite-backed task store with stable, auto-incremented task IDs.
+
+    Each add/delete is a single-row transaction, so APScheduler threads (one-shot
+    cleanup) and tool calls never rewrite the whole task list or race each other.
+    Task-type specific fields (time, cron, ...) are kept as a JSON 'schedule' column.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                type TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                schedule TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )""")
+
+    @staticmethod
+    def _row_to_task(row) -> Dict[str, Any]:
+        return {"id": row["id"], "type": row["type"], "prompt": row["prompt"], **json.loads(row["schedule"])}
+
+    def add(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Inserts a task and returns it with its new 'id'."""
+        schedule = {k: v for k, v in task.items() if k not in ("id", "type", "prompt")}
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO tasks (type, prompt, schedule, created_at) VALUES (?, ?, ?, ?)",
+                (task.get("type", "once"), task["prompt"], json.dumps(schedule, ensure_ascii=False),
+                 datetime.now().isoformat(timespec="seconds")))
+        return {**task, "id": cur.lastrowid}
+
+    def get(self, task_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def delete(self, task_id: int) -> Optional[Dict[str, Any]]:
+        """Deletes a task by ID and returns it, or None if there was no such task."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return self._row_to_task(row) if row else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM tasks ORDER BY id").fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def import_json(self, path):
+        """One-time migration from the old tasks.json; the file is renamed afterwards so it isn't imported twice."""
+        if not os.path.exists(path) or self.count():
+            return 0
+        with open(path, encoding="utf-8") as f:
+            tasks = json.load(f)
+        for task in tasks:
+            self.add(task)
+        os.replace(path, f"{path}.migrated")
+        print(f"✅ [Scheduler] Imported {len(tasks)} tasks from {os.path.basename(path)} into {os.path.basename(self.path)}")
+        return len(tasks)
+
+task_store = TaskStore(TASKS_DB)
 
 def load_tasks():
-    if not os.path.exists(TASKS_FILE):
-        save_tasks([])
-        return []
-    with open(TASKS_FILE, "r") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            save_tasks([])
-            return []
-
-def save_tasks(tasks):
-    with open(TASKS_FILE, "w") as f:
-        json.dump(tasks, f, indent=4)
+    return task_store.all()
 
 # ---------------- Webhook ----------------
 
 def send_webhook_trigger(prompt):
-    try:
-        resp = requests.post(TRIGGER_WEBHOOK_URL, json={"prompt": prompt}, timeout=10)
-        resp.raise_for_status()
-        print(f"[{datetime.now()}] ✅ Webhook triggered: {prompt}")
-    except Exception as e:
-        print(f"[{datetime.now()}] ❌ Error triggering webhook for '{prompt}': {e}")
-
-scheduler = BackgroundScheduler()
-scheduler.start()
-scheduler.print_jobs()
+    """POSTs the prompt to the trigger webhook; raises on failure so the dispatcher can retry."""
+    resp = get_session("webhook").post(TRIGGER_WEBHOOK_URL, json={"prompt": prompt})
+    resp.raise_for_status()
+
+class WebhookDispatcher:
+    """
+    Persistent webhook delivery queue with retries and a dead-letter list.
+
+    Scheduler jobs only insert a row and return, so a burst of cron firings never ties
+    up APScheduler's worker threads. A fixed set of sender threads delivers due rows;
+    failures are retried with exponential backoff and, after WEBHOOK_MAX_ATTEMPTS,
+    kept as 'dead' rows for list_dead_webhooks / retry_dead_webhook. Pending rows
+    survive restarts and are picked up again on start().
+    """
+
+    def __init__(self, path, senders=WEBHOOK_SENDERS):
+        self.senders = senders
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._due = []  # heap of (next_attempt_at, delivery_id)
+        self._threads = []
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS webhook_deliveries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id INTEGER,
+                prompt TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                created_at TEXT NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_webhook_deliveries_status ON webhook_deliveries (status)")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _push(self, when, delivery_id):
+        with self._cond:
+            heapq.heappush(self._due, (when, delivery_id))
+            self._cond.notify()
+
+    def enqueue(self, prompt, task_id=None):
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO webhook_deliveries (task_id, prompt, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                (task_id, prompt, now, datetime.now().isoformat(timespec="milliseconds")))
+        self._push(now, cur.lastrowid)
+        return cur.lastrowid
+
+    def start(self):
+        if self._threads:
+            return
+        # Rows claimed by a sender when the process stopped were never confirmed as sent
+        self._execute("UPDATE webhook_deliveries SET status = 'pending' WHERE status = 'sending'")
+        for row in self._execute("SELECT id, next_attempt_at FROM webhook_deliveries WHERE status = 'pending'"):
+            self._push(row["next_attempt_at"], row["id"])
+        for i in range(self.senders):
+            thread = threading.Thread(target=self._sender, name=f"webhook-sender-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _sender(self):
+        while True:
+            with self._cond:
+                while not self._due or self._due[0][0] > time.time():
+                    self._cond.wait(self._due[0][0] - time.time() if self._due else None)
+                _, delivery_id = heapq.heappop(self._due)
+            try:
+                self._deliver(delivery_id)
+            except Exception as e:
+                print(f"[{datetime.now()}] ❌ Webhook dispatcher error on delivery {delivery_id}: {e}")
+
+    def _claim(self, delivery_id):
+        """Atomically marks a due pending row as 'sending'; returns it, or None if it isn't ours to send."""
+        with self._lock:
+            claimed = self._conn.execute(
+                "UPDATE webhook_deliveries SET status = 'sending' "
+                "WHERE id = ? AND status = 'pending' AND next_attempt_at <= ?", (delivery_id, time.time())).rowcount
+            if claimed != 1:
+                return None
+            return self._conn.execute("SELECT * FROM webhook_deliveries WHERE id = ?", (delivery_id,)).fetchone()
+
+    def _deliver(self, delivery_id):
+        # The same ID can be on the heap twice (enqueue before start, a stale retry entry);
+        # only the sender that claims the row sends it
+        row = self._claim(delivery_id)
+        if row is None:
+            return
+        start = time.perf_counter()
+        try:
+            send_webhook_trigger(row["prompt"])
+        except Exception as e:
+            scheduler_metrics.record_webhook(time.perf_counter() - start, ok=False)
+            attempts = row["attempts"] + 1
+            if attempts >= WEBHOOK_MAX_ATTEMPTS:
+                self._execute("UPDATE webhook_deliveries SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                              (attempts, str(e), delivery_id))
+                scheduler_metrics.count("webhook_dead")
+                print(f"[{datetime.now()}] 🛑 Webhook for '{row['prompt']}' dead after {attempts} attempts: {e}")
+                return
+            delay = min(WEBHOOK_RETRY_MAX, WEBHOOK_RETRY_BASE * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+            next_attempt = time.time() + delay
+            self._execute("UPDATE webhook_deliveries SET status = 'pending', attempts = ?, next_attempt_at = ?, "
+                          "last_error = ? WHERE id = ?", (attempts, next_attempt, str(e), delivery_id))
+            self._push(next_attempt, delivery_id)
+            print(f"[{datetime.now()}] 🔄 Webhook for '{row['prompt']}' failed ({e}), retry {attempts} in {delay:.0f}s")
+            return
+        scheduler_metrics.record_webhook(time.perf_counter() - start, ok=True,
+                                         queue_delay=time.time() - datetime.fromisoformat(row["created_at"]).timestamp())
+        self._execute("DELETE FROM webhook_deliveries WHERE id = ?", (delivery_id,))
+        print(f"[{datetime.now()}] ✅ Webhook triggered: {row['prompt']}")
+
+    def dead_letters(self, limit=50):
+        return [dict(row) for row in self._execute(
+            "SELECT * FROM webhook_deliveries WHERE status = 'dead' ORDER BY id DESC LIMIT ?", (limit,))]
+
+    def pending_count(self):
+        return self._execute("SELECT COUNT(*) FROM webhook_deliveries WHERE status IN ('pending', 'sending')")[0][0]
+
+    def retry_dead(self, delivery_id):
+        """Moves a dead delivery back to the queue with a fresh attempt budget."""
+        now = time.time()
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE webhook_deliveries SET status = 'pending', attempts = 0, next_attempt_at = ? "
+                "WHERE id = ? AND status = 'dead'", (now, delivery_id)).rowcount
+        if updated:
+            self._push(now, delivery_id)
+        return bool(updated)
+
+dispatcher = WebhookDispatcher(TASKS_DB)
+
+# ---------------- Metrics ----------------
+
+class SchedulerMetrics:
+    """
+    Firing lag, misfires, errors and webhook latency, fed by APScheduler job events and the dispatcher.
+
+    Lag is measured when the job finishes; since jobs only enqueue a webhook delivery, that is
+    effectively how late the job started relative to its scheduled run time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.firing_lag = Histogram()
+        self.webhook_latency = Histogram()
+        self.webhook_queue_delay = Histogram()
+        self.counters = {"executed": 0, "missed": 0, "errors": 0, "webhook_ok": 0, "webhook_failed": 0, "webhook_dead": 0}
+        # task ID -> per-task stats, oldest evicted first so finished one-shot tasks don't pile up
+        self.tasks: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def _task(self, task_id):
+        stats = self.tasks.get(task_id)
+        if stats is None:
+            stats = self.tasks[task_id] = {"runs": 0, "missed": 0, "errors": 0, "last_lag": 0.0, "max_lag": 0.0, "lag_sum": 0.0}
+            if len(self.tasks) > TASK_METRICS_MAX:
+                self.tasks.popitem(last=False)
+        return stats
+
+    def on_job_event(self, event):
+        lag = max((datetime.now(timezone.utc) - event.scheduled_run_time).total_seconds(), 0.0)
+        task_id = int(event.job_id.split("-", 1)[1]) if event.job_id.startswith("task-") else event.job_id
+        if event.code == EVENT_JOB_MISSED:
+            kind = "missed"
+        elif event.code == EVENT_JOB_ERROR:
+            kind = "errors"
+        else:
+            kind = "executed"
+        with self._lock:
+            self.counters[kind] += 1
+            stats = self._task(task_id)
+            if kind == "missed":
+                stats["missed"] += 1
+                return
+            if kind == "errors":
+                stats["errors"] += 1
+            stats["runs"] += 1
+            stats["last_lag"] = lag
+            stats["max_lag"] = max(stats["max_lag"], lag)
+            stats["lag_sum"] += lag
+        self.firing_lag.observe(lag)
+
+    def record_webhook(self, seconds, ok, queue_delay=None):
+        self.webhook_latency.observe(seconds)
+        self.count("webhook_ok" if ok else "webhook_failed")
+        if queue_delay is not None:
+            self.webhook_queue_delay.observe(max(queue_delay, 0.0))
+
+    def forget_task(self, task_id):
+        with self._lock:
+            self.tasks.pop(task_id, None)
+
+    def task_stats(self):
+        with self._lock:
+            return {task_id: dict(stats) for task_id, stats in self.tasks.items()}
+
+    def prometheus_lines(self):
+        lines = ["# HELP mcp_scheduler_events_total Scheduler job and webhook delivery outcomes.",
+                 "# TYPE mcp_scheduler_events_total counter"]
+        with self._lock:
+            lines.extend(f'mcp_scheduler_events_total{{event="{k}"}} {v}' for k, v in self.counters.items())
+        for name, hist, help_text in [("mcp_scheduler_firing_lag_seconds", self.firing_lag, "How late jobs ran."),
+                                      ("mcp_scheduler_webhook_seconds", self.webhook_latency, "Webhook send latency."),
+                                      ("mcp_scheduler_webhook_delay_seconds", self.webhook_queue_delay,
+                                       "Time from enqueue to successful delivery.")]:
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} histogram", *histogram_lines(name, "", hist)])
+        return lines
+
+scheduler_metrics = SchedulerMetrics()
+tool_metrics.add_collector(scheduler_metrics.prometheus_lines)
+
+scheduler = BackgroundScheduler(executors={"default": ThreadPoolExecutor(SCHEDULER_WORKERS)})
+scheduler.add_listener(scheduler_metrics.on_job_event, EVENT_JOB_EXECUTED | EVENT_JOB_MISSED | EVENT_JOB_ERROR)
+
+def drop_missed_once_task(event):
+    """APScheduler drops a one-shot job that missed its grace time; remove its task too so the store matches live jobs."""
+    if not event.job_id.startswith("task-"):
+        return
+    task = task_store.get(int(event.job_id.split("-", 1)[1]))
+    if task and task["type"] == "once":
+        task_store.delete(task["id"])
+        print(f"[{datetime.now()}] ⏭ One-time task {task['id']} '{task['prompt']}' missed its run time ({task['time']}), removed")
+
+scheduler.add_listener(drop_missed_once_task, EVENT_JOB_MISSED)
 
 def load_and_schedule_all():
-    tasks = load_tasks()
-    for task in tasks:
+    task_store.import_json(TASKS_FILE)
+    for task in load_tasks():
         schedule_task(task)
 
 # ---------------- MCP Tools ----------------
@@ -96,21 +524,22 @@ def register_tools(mcp):
         except ValueError:
             return f"❌ Invalid datetime format. Use '{DATE_FORMAT}'"
 
-        tasks = load_tasks()
-        task = {"prompt": prompt, "type": "once", "time": run_time}
-        tasks.append(task)
-        save_tasks(tasks)
+        task = task_store.add({"prompt": prompt, "type": "once", "time": run_time})
         schedule_task(task)
-        return f"✅ One-time task added: '{prompt}' at {run_time}"
+        return f"✅ One-time task #{task['id']} added: '{prompt}' at {run_time}"
 
     @mcp.tool()
-    def add_cron_task(prompt: str, cron_expr: str) -> str:
+    def add_cron_task(prompt: str, cron_expr: str, jitter: int = 0, offset: int = 0, spread: bool = False) -> str:
         """
         MCP Tool: Schedule a recurring task using a CRON expression.
 
         Args:
             prompt (str): The action or instruction to execute.
             cron_expr (str): CRON expression defining the schedule (e.g., "0 7 * * *" for every day at 07:00).
+            jitter (int): Delay each run by a random 0..jitter seconds.
+            offset (int): Run this many seconds after each CRON time.
+            spread (bool): Automatically offset this task away from other tasks with the same CRON expression,
+                so they don't all fire on the same round minute.
 
         Returns:
             str: Success message with the CRON expression or error if the expression is invalid.
@@ -124,12 +553,46 @@ def register_tools(mcp):
         except Exception:
             return "❌ Invalid CRON expression."
 
-        tasks = load_tasks()
         task = {"prompt": prompt, "type": "cron", "cron": cron_expr}
-        tasks.append(task)
-        save_tasks(tasks)
+        error = prepare_recurring_task(task, jitter, offset, spread)
+        if error:
+            return error
+        task = task_store.add(task)
+        schedule_task(task)
+        return f"✅ CRON task #{task['id']} added: '{prompt}' ({cron_expr}{format_offset_jitter(task)})"
+
+    @mcp.tool()
+    def add_interval_task(prompt: str, days: int = 0, hours: int = 0, minutes: int = 0, seconds: int = 0,
+                          jitter: int = 0, offset: int = 0, spread: bool = False) -> str:
+        """
+        MCP Tool: Schedule a task to repeat at a fixed interval.
+
+        Args:
+            prompt (str): The action or instruction to execute.
+            days, hours, minutes, seconds (int): The interval between runs; the first run is one interval from now.
+            jitter (int): Delay each run by a random 0..jitter seconds.
+            offset (int): Shift every run by this many seconds.
+            spread (bool): Automatically offset this task away from other tasks with the same interval.
+
+        Returns:
+            str: Success message with the task ID or error if the interval is invalid.
+
+        Example:
+            add_interval_task("Check the water heater", minutes=30, spread=True)
+        """
+        interval = {"days": days, "hours": hours, "minutes": minutes, "seconds": seconds}
+        if any(v < 0 for v in interval.values()) or not any(interval.values()):
+            return "❌ Interval must be positive."
+
+        task = {"prompt": prompt, "type": "interval", **interval,
+                "start": (datetime.now() + timedelta(**interval)).isoformat(timespec="seconds")}
+        error = prepare_recurring_task(task, jitter, offset, spread)
+        if error:
+            return error
+        task = task_store.add(task)
         schedule_task(task)
-        return f"✅ CRON task added: '{prompt}' ({cron_expr})"
+        return (f"✅ Interval task #{task['id']} added: '{prompt}' every {days}d {hours}h {minutes}m {seconds}s"
+                f"{format_offset_jitter(task)}")
 
     @mcp.tool()
     def list_scheduled_tasks() -> str:
@@ -137,7 +600,7 @@ def register_tools(mcp):
         MCP Tool: List all currently scheduled tasks.
 
         Returns:
-            str: Numbered list of tasks with their type (One-time, CRON, Interval) and schedule details.
+            str: List of tasks with their ID (for delete_scheduled_task), type (One-time, CRON, Interval) and schedule details.
                  Returns a message if no tasks are scheduled.
 
         Example:
@@ -147,40 +610,108 @@ def register_tools(mcp):
         if not tasks:
             return "No scheduled tasks."
         lines = []
-        for i, task in enumerate(tasks, 1):
+        for task in tasks:
+            i = f"#{task['id']}"
             if task["type"] == "once":
-                lines.append(f"{i}. [One-time] {task['prompt']} at {task['time']}")
+                lines.append(f"{i} [One-time] {task['prompt']} at {task['time']}")
             elif task["type"] == "cron":
-                lines.append(f"{i}. [CRON] {task['prompt']} ({task['cron']})")
+                lines.append(f"{i} [CRON] {task['prompt']} ({task['cron']}{format_offset_jitter(task)})")
             elif task["type"] == "interval":
                 lines.append(
-                    f"{i}. [Interval] {task['prompt']} every {task.get('days', 0)}d {task.get('hours', 0)}h {task.get('minutes', 0)}m {task.get('seconds', 0)}s")
+                    f"{i} [Interval] {task['prompt']} every {task.get('days', 0)}d {task.get('hours', 0)}h {task.get('minutes', 0)}m {task.get('seconds', 0)}s{format_offset_jitter(task)}")
         return "\n".join(lines)
 
     @mcp.tool()
-    def delete_scheduled_task(task_number: int) -> str:
+    def delete_scheduled_task(task_id: int) -> str:
         """
-        MCP Tool: Delete a scheduled task by its list number.
+        MCP Tool: Delete a scheduled task by its ID and stop its scheduled job.
 
         Args:
-            task_number (int): The 1-based index of the task in the list of scheduled tasks.
+            task_id (int): The task ID shown by list_scheduled_tasks (e.g. 12 for "#12").
 
         Returns:
-            str: Success message with details of the removed task or error if the number is invalid.
+            str: Success message with details of the removed task or error if there is no such task.
 
         Example:
-            delete_scheduled_task(2)
-            # Removes the second task in the scheduled list
+            delete_scheduled_task(12)
+            # Removes task #12 and cancels its pending runs
         """
-        tasks = load_tasks()
-        if task_number < 1 or task_number > len(tasks):
-            return "❌ Invalid task number."
-        removed = tasks.pop(task_number - 1)
-        save_tasks(tasks)
-        return f"✅ Removed task: '{removed['prompt']}'"
+        removed = task_store.delete(task_id)
+        if removed is None:
+            return f"❌ No task with ID {task_id}."
+        unschedule_task(task_id)
+        scheduler_metrics.forget_task(task_id)
+        return f"✅ Removed task #{task_id}: '{removed['prompt']}'"
+
+    @mcp.tool()
+    def get_scheduler_metrics(top: int = 10) -> str:
+        """
+        MCP Tool: Show how late scheduled tasks fire, how often they miss, and webhook latency.
+
+        Args:
+            top (int): Number of tasks to list, sorted by worst firing lag.
+
+        Returns:
+            str: Executor/queue sizing, counters, lag and webhook latency percentiles (seconds)
+                 and the tasks with the highest lag.
+        """
+        m = scheduler_metrics
+        lines = [
+            f"Executor: {SCHEDULER_WORKERS} workers | misfire grace {MISFIRE_GRACE_TIME}s | "
+            f"webhook senders: {dispatcher.senders}, pending: {dispatcher.pending_count()}",
+            "Counters: " + ", ".join(f"{k}={v}" for k, v in m.counters.items()),
+        ]
+        for label, hist in [("Firing lag", m.firing_lag), ("Webhook latency", m.webhook_latency),
+                            ("Webhook enqueue->delivered", m.webhook_queue_delay)]:
+            lines.append(f"{label}: " + ", ".join(f"{k}={v}" for k, v in hist.summary().items()))
+
+        tasks = sorted(m.task_stats().items(), key=lambda kv: kv[1]["max_lag"], reverse=True)[:top]
+        if tasks:
+            lines.append("Task | runs | missed | errors | last lag | avg lag | max lag")
+            for task_id, t in tasks:
+                avg = t["lag_sum"] / t["runs"] if t["runs"] else 0.0
+                lines.append(f"#{task_id} | {t['runs']} | {t['missed']} | {t['errors']} | "
+                             f"{t['last_lag']:.3f}s | {avg:.3f}s | {t['max_lag']:.3f}s")
+        return "\n".join(lines)
+
+    @mcp.tool()
+    def list_dead_webhooks(limit: int = 20) -> str:
+        """
+        MCP Tool: List scheduled-task webhook deliveries that failed after all retries.
+
+        Args:
+            limit (int): Maximum number of dead deliveries to show, newest first.
+
+        Returns:
+            str: One line per delivery with its ID (for retry_dead_webhook), task, attempts and last error.
+        """
+        dead = dispatcher.dead_letters(limit)
+        pending = dispatcher.pending_count()
+        if not dead:
+            return f"No dead webhook deliveries. {pending} pending."
+        lines = [f"{pending} pending, dead deliveries:"]
+        for d in dead:
+            lines.append(f"#{d['id']} task #{d['task_id']} '{d['prompt']}' | {d['attempts']} attempts | "
+                         f"created {d['created_at']} | {d['last_error']}")
+        return "\n".join(lines)
+
+    @mcp.tool()
+    def retry_dead_webhook(delivery_id: int) -> str:
+        """
+        MCP Tool: Re-queue a dead webhook delivery for another round of retries.
+
+        Args:
+            delivery_id (int): The delivery ID shown by list_dead_webhooks.
+        """
+        if not dispatcher.retry_dead(delivery_id):
+            return f"❌ No dead delivery with ID {delivery_id}."
+        return f"🔄 Delivery #{delivery_id} re-queued."
 
 # ---------------- Initialize ----------------
 
-# Load existing tasks from file and schedule them
-load_and_schedule_all()
-print(f"✅ [Scheduler] All tasks loaded and scheduled.")
\ No newline at end of file
+def start_scheduler(mcp):
+    """Loads and schedules stored tasks and starts the scheduler and webhook senders (not at import time)."""
+    load_and_schedule_all()
+    scheduler.start()
+    dispatcher.start()
+    print(f"✅ [Scheduler] {len(scheduler.get_jobs())} tasks loaded and scheduled.")
\ No newline at end of file
@@ -0,0 +1,33 @@
+from typing import Any, Dict
+from tool_metrics import tool_metrics
+
+SORT_KEYS = ("calls", "p95_ms", "total_s", "errors", "avg_bytes", "max_in_flight")
+
+
+def register_tools(mcp):
+
+    @mcp.tool()
+    def get_tool_stats(sort_by: str = "total_s", limit: int = 15, backend: str = "") -> Dict[str, Any]:
+        """
+        Shows per-tool call counts, latency, errors, concurrency and response sizes since startup.
+
+        Use it to find the hot paths: total_s is the time spent in a tool overall, p95_ms its tail latency.
+        'failures' counts calls that returned a ❌ message, 'errors' calls that raised.
+
+        :param sort_by: One of calls, p95_ms, total_s, errors, avg_bytes, max_in_flight.
+        :param limit: Number of tools to return.
+        :param backend: Only tools of this backend (portainer, homeassistant, ssh, webhook, local).
+        :returns: {"tools": [...], "backends": {backend: {"calls", "errors", "failures", "total_s"}}}
+        """
+        if sort_by not in SORT_KEYS:
+            return {"error": f"Unknown sort_by '{sort_by}'. Use one of: {', '.join(SORT_KEYS)}"}
+        rows = [r for r in tool_metrics.summary() if r["calls"] or r["in_flight"]]
+        per_backend: Dict[str, Dict[str, Any]] = {}
+        for r in rows:
+            agg = per_backend.setdefault(r["backend"], {"calls": 0, "errors": 0, "failures": 0, "total_s": 0.0})
+            for key in ("calls", "errors", "failures", "total_s"):
+                agg[key] += r[key]
+        if backend:
+            rows = [r for r in rows if r["backend"] == backend]
+        rows.sort(key=lambda r: r[sort_by], reverse=True)
+        return {"tools": rows[:limit], "backends": per_backend}
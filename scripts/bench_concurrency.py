@@ -0,0 +1,79 @@
+"""
+Concurrency benchmark: can fast tools still answer while a slow backend is saturated?
+
+Fires SLOW_CALLS calls at a tool whose backend blocks for SLOW_SECONDS (think image
+pulls or SSH connect timeouts), then FAST_CALLS calls at a tool on a different backend,
+and reports the fast tool's latency. Runs once with plain sync tools (shared threadpool)
+and once with async tools on per-backend executors.
+
+Target: with 60 slow calls in flight, fast-tool p95 stays under 250 ms.
+
+Usage (from the project root):
+    python scripts/bench_concurrency.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastmcp import FastMCP, Client
+from backend_executor import run_blocking
+
+SLOW_CALLS = 60
+SLOW_SECONDS = 3.0
+FAST_CALLS = 20
+TARGET_P95_MS = 250
+
+
+def build_server(use_async: bool) -> FastMCP:
+    mcp = FastMCP("bench")
+
+    if use_async:
+        @mcp.tool()
+        async def slow_backend() -> str:
+            await run_blocking("ssh", time.sleep, SLOW_SECONDS)
+            return "slow"
+
+        @mcp.tool()
+        async def fast_backend() -> str:
+            await run_blocking("homeassistant", time.sleep, 0.01)
+            return "fast"
+    else:
+        @mcp.tool()
+        def slow_backend() -> str:
+            time.sleep(SLOW_SECONDS)
+            return "slow"
+
+        @mcp.tool()
+        def fast_backend() -> str:
+            time.sleep(0.01)
+            return "fast"
+
+    return mcp
+
+
+async def timed_call(client: Client, name: str) -> float:
+    start = time.perf_counter()
+    await client.call_tool(name, {})
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(use_async: bool) -> float:
+    async with Client(build_server(use_async)) as client:
+        slow = [asyncio.create_task(timed_call(client, "slow_backend")) for _ in range(SLOW_CALLS)]
+        await asyncio.sleep(0.2)  # let the slow calls occupy their workers
+        fast = sorted(await asyncio.gather(*[timed_call(client, "fast_backend") for _ in range(FAST_CALLS)]))
+        await asyncio.gather(*slow)
+    p95 = fast[int(len(fast) * 0.95) - 1]
+    label = "async + per-backend executors" if use_async else "sync tools (shared threadpool)"
+    print(f"{label:32} fast p50={fast[len(fast) // 2]:8.1f} ms  p95={p95:8.1f} ms")
+    return p95
+
+
+if __name__ == "__main__":
+    print(f"{SLOW_CALLS} slow calls x {SLOW_SECONDS}s in flight, {FAST_CALLS} fast calls on another backend")
+    asyncio.run(run(use_async=False))
+    p95 = asyncio.run(run(use_async=True))
+    print(f"{'✅' if p95 < TARGET_P95_MS else '❌'} target: fast p95 < {TARGET_P95_MS} ms")
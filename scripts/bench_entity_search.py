@@ -0,0 +1,75 @@
+"""
+Benchmark: search_entities vs. dumping the whole entities map with getAllEntities.
+
+Builds a synthetic house of ENTITY_COUNT entities (plus the real entities_map.json),
+then compares response size and latency of a full dump against top-k searches.
+
+Usage (from the project root):
+    python scripts/bench_entity_search.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.entity_search import EntityIndex, ENTITIES_MAP_FILE
+
+ENTITY_COUNT = 500
+ITERATIONS = 200
+QUERIES = ["אור מטבח", "המזגן בחדר שינה", "bedroom ac", "טלויזיה", "מאוורר סלון", "sensor door"]
+
+ROOMS = ["סלון", "מטבח", "חדר שינה", "חדר ילדים", "מרפסת", "כניסה", "משרד", "חדר רחצה"]
+DEVICES = [("light", "תאורה", "אור"), ("switch", "מתג", "שקע"), ("climate", "מזגן", "מיזוג"),
+           ("sensor", "חיישן", "טמפרטורה"), ("cover", "תריס", "וילון"), ("media_player", "רמקול", "מוזיקה")]
+
+
+def synthetic_entities(count):
+    entities = []
+    for i in range(count):
+        domain, name, alias = DEVICES[i % len(DEVICES)]
+        room = ROOMS[(i // len(DEVICES)) % len(ROOMS)]
+        entities.append({
+            "EntityId": f"{domain}.device_{i}",
+            "Name": f"{name} {i} ב{room}",
+            "Alias": [f"{alias} {room}", f"ה{name} {i}"],
+            "Hint": [f"{name} ליד החלון"],
+            "Room": room,
+        })
+    return entities
+
+
+def measure(fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        result = fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1000, len(json.dumps(result, ensure_ascii=False).encode())
+
+
+if __name__ == "__main__":
+    with open(ENTITIES_MAP_FILE, encoding="utf-8") as f:
+        entities = json.load(f) + synthetic_entities(ENTITY_COUNT)
+    path = os.path.join(os.path.dirname(ENTITIES_MAP_FILE), "bench_entities.tmp.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entities, f, ensure_ascii=False)
+
+    def full_dump():
+        # What getAllEntities did per call before the config registry: read + parse the whole file
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    try:
+        dump_ms, dump_bytes = measure(full_dump)
+        print(f"{len(entities)} entities")
+        print(f"{'getAllEntities (full dump)':36} {dump_ms:8.3f} ms  {dump_bytes:8d} bytes")
+
+        start = time.perf_counter()
+        index = EntityIndex(entities)
+        print(f"{'index build (once per file change)':36} {(time.perf_counter() - start) * 1000:8.3f} ms")
+
+        for query in QUERIES:
+            ms, size = measure(lambda: index.search(query, limit=5))
+            print(f"{'search ' + repr(query):36} {ms:8.3f} ms  {size:8d} bytes")
+    finally:
+        os.remove(path)
@@ -0,0 +1,186 @@
+import asyncio
+import functools
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List
+from histogram import Histogram
+
+# Response sizes in bytes
+PAYLOAD_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576)
+# Tools return "❌ ..." strings for handled failures; counted apart from raised exceptions
+FAILURE_PREFIX = "❌"
+
+
+def payload_size(result: Any) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, (str, bytes)):
+        return len(result.encode() if isinstance(result, str) else result)
+    try:
+        return len(json.dumps(result, ensure_ascii=False, default=str).encode())
+    except (TypeError, ValueError):
+        return len(str(result).encode())
+
+
+class ToolStats:
+    def __init__(self, name: str, module: str, backend: str):
+        self.name = name
+        self.module = module
+        self.backend = backend
+        self.calls = 0
+        self.errors = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.latency = Histogram()
+        self.payload = Histogram(PAYLOAD_BUCKETS)
+
+
+class ToolMetrics:
+    """
+    Call counts, latency and payload histograms, errors and in-flight calls for every registered tool.
+
+    Tools are wrapped at registration time (see InstrumentedMCP), so modules don't need
+    to do anything. Other components can add their own Prometheus lines with add_collector.
+    """
+
+    def __init__(self):
+        self.tools: Dict[str, ToolStats] = {}
+        self._lock = threading.Lock()
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def _start(self, stats: ToolStats):
+        with self._lock:
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        return time.perf_counter()
+
+    def _finish(self, stats: ToolStats, started: float, result: Any = None, error: bool = False):
+        stats.latency.observe(time.perf_counter() - started)
+        if not error:
+            stats.payload.observe(payload_size(result))
+        with self._lock:
+            stats.in_flight -= 1
+            stats.calls += 1
+            if error:
+                stats.errors += 1
+            elif isinstance(result, str) and result.startswith(FAILURE_PREFIX):
+                stats.failures += 1
+
+    def instrument(self, fn: Callable, name: str, module: str, backend: str) -> Callable:
+        """Wraps a tool function; the wrapper keeps fn's signature so FastMCP builds the same schema."""
+        stats = self.tools.get(name) or ToolStats(name, module, backend)
+        self.tools[name] = stats
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                started = self._start(stats)
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException:
+                    self._finish(stats, started, error=True)
+                    raise
+                self._finish(stats, started, result)
+                return result
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = self._start(stats)
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException:
+                    self._finish(stats, started, error=True)
+                    raise
+                self._finish(stats, started, result)
+                return result
+        return wrapper
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        """Adds a function returning extra Prometheus exposition lines for /metrics."""
+        self._collectors.append(collector)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        rows = []
+        for s in list(self.tools.values()):
+            latency = s.latency.summary()
+            rows.append({
+                "tool": s.name, "backend": s.backend, "calls": s.calls, "errors": s.errors, "failures": s.failures,
+                "in_flight": s.in_flight, "max_in_flight": s.max_in_flight,
+                "p50_ms": round(latency["p50"] * 1000, 1), "p95_ms": round(latency["p95"] * 1000, 1),
+                "max_ms": round(latency["max"] * 1000, 1),
+                "total_s": round(s.latency.sum, 3),
+                "avg_bytes": round(s.payload.sum / s.payload.count) if s.payload.count else 0,
+            })
+        return rows
+
+    def render_prometheus(self) -> str:
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        stats = list(self.tools.values())
+
+        def labels(s):
+            return f'tool="{s.name}",backend="{s.backend}"'
+
+        for name, attr, help_text in [("mcp_tool_calls_total", "calls", "Completed tool calls."),
+                                      ("mcp_tool_errors_total", "errors", "Tool calls that raised."),
+                                      ("mcp_tool_failures_total", "failures", "Tool calls that returned a failure message.")]:
+            metric(name, "counter", help_text)
+            lines.extend(f"{name}{{{labels(s)}}} {getattr(s, attr)}" for s in stats)
+        metric("mcp_tool_in_flight", "gauge", "Tool calls currently running.")
+        lines.extend(f"mcp_tool_in_flight{{{labels(s)}}} {s.in_flight}" for s in stats)
+        for name, attr, help_text in [("mcp_tool_duration_seconds", "latency", "Tool call latency."),
+                                      ("mcp_tool_response_bytes", "payload", "Tool response size.")]:
+            metric(name, "histogram", help_text)
+            for s in stats:
+                lines.extend(histogram_lines(name, labels(s), getattr(s, attr)))
+
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def histogram_lines(name: str, labels: str, histogram: Histogram) -> List[str]:
+    """Prometheus exposition lines (_bucket/_sum/_count) for a Histogram; labels like 'a="x",b="y"' or ''."""
+    snapshot = histogram.snapshot()
+    sep = "," if labels else ""
+    suffix = f"{{{labels}}}" if labels else ""
+    lines = [f'{name}_bucket{{{labels}{sep}le="{bound}"}} {count}' for bound, count in snapshot["buckets"].items()]
+    lines.append(f"{name}_sum{suffix} {snapshot['sum']}")
+    lines.append(f"{name}_count{suffix} {snapshot['count']}")
+    return lines
+
+
+class InstrumentedMCP:
+    """
+    Passed to a module's register_tools instead of the server: @mcp.tool() registers an instrumented wrapper.
+
+    Everything else (resources, prompts, ...) goes straight to the real server.
+    """
+
+    def __init__(self, mcp, module: str, backend: str):
+        self._mcp = mcp
+        self._module = module
+        self._backend = backend
+
+    def __getattr__(self, item):
+        return getattr(self._mcp, item)
+
+    def tool(self, name_or_fn=None, **kwargs):
+        def register(fn):
+            name = kwargs.get("name") or fn.__name__
+            return self._mcp.tool(**kwargs)(tool_metrics.instrument(fn, name, self._module, self._backend))
+
+        if callable(name_or_fn):
+            return register(name_or_fn)
+        if isinstance(name_or_fn, str):
+            kwargs["name"] = name_or_fn
+        return register
+
+
+tool_metrics = ToolMetrics()